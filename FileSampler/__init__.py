@@ -4,9 +4,14 @@ make up the classes needed to sample files at random.  This will help if there i
 to fit into a DataFrame or Numpy array.  The goal of this project is to be able to efficeintly and 
 effectively sample very large files.
 
-If the file is over 1 million lines the class will estimate the line length for data / line reteival.  If the 
-file is less than 1 million lines a dictionary is used to track the line length and first position of 
-the line in the file.  At about a million lines the dictionary takes up about ~80 MB of space. 
+The package only imports the standard library; pandas and numpy are imported the first time a method 
+needs them.  CsvSampler returns pandas objects by default, the string_result_backend keyword selects 
+tuples, dicts, numpy structured arrays or pyarrow tables instead.
+
+By default if the file is over 1 million lines the class will estimate the line length for data / line reteival.  
+If the file is less than 1 million lines the byte offset of the start of every line is held in a packed array, 
+8 bytes a line, so a million lines takes up about ~8 MB of space; m_int_max_indexed_lines raises or removes the 
+1 million line limit. 
 
 GitHub Repo: https://github.com/carvetighter/FileSampler
 
@@ -41,11 +46,18 @@ dataframe_csv_random_lines = csv_reader.get_random_lines(15) # retrieves 15 rand
 #$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$# 
 
 import csv
-from random import randrange
-from pandas import DataFrame, Series
-from numpy import mean
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array as PackedArray
+from random import Random, randrange
 from io import StringIO
 
+# pandas, numpy and multiprocessing.shared_memory are imported in the methods which use them so importing 
+# this package, and using TextSampler, only loads the light parts of the standard library
+
 #$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
 #$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
 #
@@ -54,6 +66,419 @@ from io import StringIO
 #$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
 #$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
 
+class LineIndexes(object):
+    """
+    __init__():
+    constructor, takes the byte offsets of the lines
+
+    __len__():
+    the number of lines in the index
+
+    __getitem__():
+    returns the start and length of a line as a dictionary
+
+    tobytes():
+    returns the byte offsets as bytes
+
+    _get_offset():
+    returns one byte offset
+    """
+
+    def __init__(self, m_array_offsets):
+        """
+        this method initializes the line indexes; the byte offset of the start of each line is held in
+        a packed array of 64 bit integers with the size of the file at the end, so the length of a line is 
+        the difference of two offsets; it is indexed the same as a list of dictionaries
+
+        Requirements:
+        package array
+
+        Inputs:
+        m_array_offsets
+        Type: array.array of 'q'
+        Desc: byte offset of the start of every line, followed by the size of the file
+
+        Important Info:
+        None
+
+        Objects and Properties:
+        _array_offsets
+        Type: array.array of 'q'
+        Desc: byte offset of the start of every line, followed by the size of the file
+
+        _int_num_lines
+        Type: integer
+        Desc: number of lines in the index
+        """
+        self._array_offsets = m_array_offsets
+        self._int_num_lines = len(m_array_offsets) - 1
+
+    def tobytes(self):
+        """
+        this method returns the byte offsets as the bytes of 64 bit integers
+
+        Requirements:
+        None
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        None
+
+        Return:
+        variable
+        Type: bytes
+        Desc: byte offsets of the lines followed by the size of the file
+        """
+        return self._array_offsets.tobytes()
+
+    def _get_offset(self, m_int_position):
+        """
+        this method returns one byte offset
+
+        Requirements:
+        None
+
+        Inputs:
+        m_int_position
+        Type: integer
+        Desc: position in the offsets, 0 to the number of lines
+
+        Important Info:
+        None
+
+        Return:
+        variable
+        Type: integer
+        Desc: byte offset
+        """
+        return self._array_offsets[m_int_position]
+
+    def __len__(self):
+        return self._int_num_lines
+
+    def __getitem__(self, m_int_line_number):
+        if m_int_line_number < 0:
+            m_int_line_number += self._int_num_lines
+        if not 0 <= m_int_line_number < self._int_num_lines:
+            raise IndexError('line index out of range')
+        int_start = self._get_offset(m_int_line_number)
+        return {'start': int_start, 'length': self._get_offset(m_int_line_number + 1) - int_start}
+
+class SharedLineIndexes(LineIndexes):
+    """
+    __init__():
+    constructor, attaches to line indexes already in shared memory
+
+    create():
+    class method, copies line indexes into a new block of shared memory
+
+    name
+    property, the name of the shared memory block
+
+    owner
+    property, flag if this object created the shared memory block
+
+    close():
+    detaches this process from the shared memory
+
+    unlink():
+    frees the shared memory; only the process which created the block should call this
+    """
+
+    def __init__(self, m_string_name, m_int_num_lines):
+        """
+        this method attaches to line indexes stored in shared memory; the byte offsets of the lines
+        are stored as 64 bit integers, the same as LineIndexes
+
+        Requirements:
+        package struct
+        package multiprocessing.shared_memory.SharedMemory
+
+        Inputs:
+        m_string_name
+        Type: string
+        Desc: name of the shared memory block
+
+        m_int_num_lines
+        Type: integer
+        Desc: number of lines in the index
+
+        Important Info:
+        pickling this object only pickles the name and number of lines; unpickling it in another 
+        process attaches to the same block of shared memory
+
+        Objects and Properties:
+        _shared_memory
+        Type: SharedMemory
+        Desc: the shared memory block
+
+        _int_num_lines
+        Type: integer
+        Desc: number of lines in the index
+
+        _struct_offset
+        Type: struct.Struct
+        Desc: format of one offset in the shared memory, a 64 bit integer
+
+        _bool_owner
+        Type: boolean
+        Desc: flag to indicate this object created the shared memory
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        try:
+            # python 3.13+; the process that creates the block is responsible for freeing it
+            self._shared_memory = SharedMemory(name = m_string_name, track = False)
+        except TypeError:
+            self._shared_memory = SharedMemory(name = m_string_name)
+        self._int_num_lines = m_int_num_lines
+        self._struct_offset = struct.Struct('=q')
+        self._bool_owner = False
+
+    @classmethod
+    def create(cls, m_line_indexes):
+        """
+        this method copies line indexes into a new block of shared memory
+
+        Requirements:
+        package struct
+        package multiprocessing.shared_memory.SharedMemory
+
+        Inputs:
+        m_line_indexes
+        Type: LineIndexes
+        Desc: line indexes built by FileSamplerBase
+
+        Important Info:
+        the caller owns the shared memory and must call unlink() when it is no longer needed
+
+        Return:
+        object
+        Type: SharedLineIndexes
+        Desc: line indexes in shared memory
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        bytes_offsets = m_line_indexes.tobytes()
+        shared_memory = SharedMemory(create = True, size = len(bytes_offsets))
+        shared_memory.buf[:len(bytes_offsets)] = bytes_offsets
+
+        shared_indexes = cls.__new__(cls)
+        shared_indexes._shared_memory = shared_memory
+        shared_indexes._int_num_lines = len(m_line_indexes)
+        shared_indexes._struct_offset = struct.Struct('=q')
+        shared_indexes._bool_owner = True
+        return shared_indexes
+
+    @property
+    def name(self):
+        return self._shared_memory.name
+
+    @property
+    def owner(self):
+        return self._bool_owner
+
+    def close(self):
+        """
+        this method detaches this process from the shared memory; the index can not be used after
+
+        Requirements:
+        None
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        None
+
+        Return:
+        None
+        Type: n/a
+        Desc: n/a
+        """
+        self._shared_memory.close()
+
+    def unlink(self):
+        """
+        this method frees the shared memory; other processes attached to it keep their view until 
+        they close it
+
+        Requirements:
+        None
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        None
+
+        Return:
+        None
+        Type: n/a
+        Desc: n/a
+        """
+        self._shared_memory.unlink()
+
+    def tobytes(self):
+        return bytes(self._shared_memory.buf[:self._struct_offset.size * (self._int_num_lines + 1)])
+
+    def _get_offset(self, m_int_position):
+        return self._struct_offset.unpack_from(self._shared_memory.buf,
+                                               self._struct_offset.size * m_int_position)[0]
+
+    def __reduce__(self):
+        return (SharedLineIndexes, (self.name, self._int_num_lines))
+
+class IndexPermutation(object):
+    """
+    __init__():
+    constructor, takes the number of indexes and the seed and epoch of the shuffle
+
+    __len__():
+    the number of indexes in the permutation
+
+    __getitem__():
+    returns the shuffled index at a position, without building the shuffled list
+
+    _feistel():
+    shuffles the bits of a position with the feistel rounds
+
+    _mix():
+    the round function of the feistel network
+    """
+
+    _int_mask_64 = (1 << 64) - 1
+    _int_num_rounds = 6
+
+    def __init__(self, m_int_size, m_int_seed, m_int_epoch = 0):
+        """
+        this method initializes a random permutation of the indexes 0 to m_int_size - 1; the 
+        permutation is a keyed feistel network so any position can be computed on its own and 
+        no shuffled list is held in memory
+
+        Requirements:
+        package hashlib
+
+        Inputs:
+        m_int_size
+        Type: integer
+        Desc: number of indexes to shuffle
+
+        m_int_seed
+        Type: integer
+        Desc: seed of the shuffle
+
+        m_int_epoch
+        Type: integer
+        Desc: epoch of the shuffle; each epoch is a different permutation for the same seed
+
+        Important Info:
+        the same size, seed and epoch give the same permutation in every process and on every host
+
+        Objects and Properties:
+        _int_size
+        Type: integer
+        Desc: number of indexes
+
+        _int_half_bits
+        Type: integer
+        Desc: number of bits in each half of the feistel network
+
+        _int_half_mask
+        Type: integer
+        Desc: mask for one half of the feistel network
+
+        _list_round_keys
+        Type: list
+        Desc: 64 bit key for each feistel round, derived from the seed and epoch
+        """
+        if m_int_size < 0:
+            raise ValueError('size of the permutation must be 0 or greater')
+
+        self._int_size = m_int_size
+        self._int_half_bits = (max(m_int_size - 1, 1).bit_length() + 1) // 2
+        self._int_half_mask = (1 << self._int_half_bits) - 1
+
+        bytes_digest = hashlib.blake2b('{0}:{1}'.format(m_int_seed, m_int_epoch).encode('ascii'),
+                                       digest_size = 8 * self._int_num_rounds).digest()
+        self._list_round_keys = [int.from_bytes(bytes_digest[x:x + 8], 'little')
+                                 for x in range(0, len(bytes_digest), 8)]
+
+    def __len__(self):
+        return self._int_size
+
+    def __getitem__(self, m_int_position):
+        if m_int_position < 0:
+            m_int_position += self._int_size
+        if not 0 <= m_int_position < self._int_size:
+            raise IndexError('permutation index out of range')
+
+        # the feistel network shuffles a power of 4 sized range, which is less than 4 times the size;
+        # re-shuffle until the index lands in range, which keeps the permutation one to one
+        int_index = self._feistel(m_int_position)
+        while int_index >= self._int_size:
+            int_index = self._feistel(int_index)
+        return int_index
+
+    def _feistel(self, m_int_value):
+        """
+        this method shuffles the bits of a value; it is one to one on the range 0 to 4 ** _int_half_bits - 1
+
+        Requirements:
+        None
+
+        Inputs:
+        m_int_value
+        Type: integer
+        Desc: value to shuffle
+
+        Important Info:
+        None
+
+        Return:
+        variable
+        Type: integer
+        Desc: shuffled value
+        """
+        int_left = m_int_value >> self._int_half_bits
+        int_right = m_int_value & self._int_half_mask
+        for int_key in self._list_round_keys:
+            int_left, int_right = int_right, int_left ^ (self._mix(int_right ^ int_key) & self._int_half_mask)
+        return (int_left << self._int_half_bits) | int_right
+
+    def _mix(self, m_int_value):
+        """
+        this method is the round function of the feistel network, the splitmix64 finalizer
+
+        Requirements:
+        None
+
+        Inputs:
+        m_int_value
+        Type: integer
+        Desc: 64 bit value to mix
+
+        Important Info:
+        None
+
+        Return:
+        variable
+        Type: integer
+        Desc: mixed 64 bit value
+        """
+        int_value = (m_int_value + 0x9E3779B97F4A7C15) & self._int_mask_64
+        int_value = ((int_value ^ (int_value >> 30)) * 0xBF58476D1CE4E5B9) & self._int_mask_64
+        int_value = ((int_value ^ (int_value >> 27)) * 0x94D049BB133111EB) & self._int_mask_64
+        return int_value ^ (int_value >> 31)
+
 class FileSamplerBase(object):
     """
     __init__():
@@ -67,28 +492,60 @@ class FileSamplerBase(object):
     estimate_mode
     property, flag to indicate if line length is estimateted or counted
 
+    index_loaded
+    property, flag to indicate the line indexes were loaded from a saved index file
+
     get_line_indexes():
     returns a list of line indexes
 
+    save_line_indexes():
+    saves the line indexes to a file next to the text file
+
+    load_line_indexes():
+    loads line indexes saved by save_line_indexes()
+
+    share_line_indexes():
+    moves the line indexes into shared memory so pickled copies of the sampler share them
+
+    release_line_indexes():
+    detaches from the shared memory of the line indexes, frees it if this sampler created it
+
+    iter_shard_line_numbers():
+    yields the shuffled line numbers of one shard of the file for an epoch
+
     _count_lines():
     returns the number of lines in the file
 
     _get_avg_len():
     calculates the average length of a sampling of lines
 
+    _get_file_signature():
+    returns the size and modification time of the file
+
+    _open_text():
+    opens the file as text which only ends lines at a line feed, the same as the line indexes
+
     _build_line_indexes():
     builds the line indexes, returns a list of dictionaries
     """
 
+    # version of the format written by save_line_indexes(); older index files are rebuilt
+    _int_index_version = 3
+
+    # header of a saved line index: file type, version, file size, file modification time in nanoseconds,
+    # estimate mode, number of lines, average line length; the byte offsets follow as 64 bit integers
+    _bytes_line_index_magic = b'FSLINEIX'
+    _struct_line_index_header = struct.Struct('<8sqqq?qq')
+
     def __init__(self, m_string_filepath, m_string_endline_character = '\n', 
-        m_bool_estimate = False):
+        m_bool_estimate = False, m_bool_use_saved_index = False, m_int_max_indexed_lines = 1000000):
         """
         this method initialized the base class for the text file sampler; class will attempt to map the file
-        for the start character of the line and the length of each line; if the file is more than 1 million lines 
-        this method will estimate the length of the line through sampling 1000 rows
+        for the start byte of each line; if the file is more than m_int_max_indexed_lines lines this method 
+        will estimate the length of the line through sampling 1000 rows
         
         Requirements:
-        package numpy.mean
+        None
         
         Inputs:
         m_string_filepath
@@ -103,6 +560,15 @@ class FileSamplerBase(object):
         Type: boolean
         Desc: flag to indicate if the mode of line retrievela is by estimating the line length or 
             use list of dictionaries for line start position and line length
+
+        m_bool_use_saved_index
+        Type: boolean
+        Desc: flag to load the line indexes saved with save_line_indexes() instead of reading the file;
+            if there is no saved index or it is out of date the file is read as normal
+
+        m_int_max_indexed_lines
+        Type: integer
+        Desc: files with more lines than this are sampled in estimate mode; None to always index the file
         
         Important Info:
         None
@@ -130,17 +596,37 @@ class FileSamplerBase(object):
             use list of dictionaries for line start position and line length
 
         _list_line_indexes
-        Type: list of dictionaries
-        Desc: each dictionary contines the character number for the start of the line and the length of the line; 
-            the index of the list is the line number starting at 0; this is only if the number of lines in the file
-            is less than 1 million
+        Type: LineIndexes
+        Desc: the byte offset of the start of each line, indexed like a list of dictionaries with the start byte 
+            and the length in bytes of the line; the index is the line number starting at 0; this is None
+            in estimate mode
         _list_line_indexes[x] -> {'start': <integer>, 'length':<integer>}
         
         eg: _list_line_indexes[3] -> {'start':57, 'length':23}
+
+        after share_line_indexes() this is a SharedLineIndexes object, which is indexed the same way
+
+        _bool_index_loaded
+        Type: boolean
+        Desc: flag to indicate the line indexes were loaded from a saved index file
         """
         self._string_filepath = m_string_filepath
         self._string_endline = m_string_endline_character
         self._bool_estimate_mode = m_bool_estimate
+        self._bool_index_loaded = False
+
+        if m_bool_use_saved_index:
+            try:
+                self.load_line_indexes()
+            except (OSError, ValueError):
+                # no saved index, or it is stale, from an older version or corrupt; read the file
+                pass
+            else:
+                # a saved estimate is only used if estimate mode is allowed
+                if not self._bool_estimate_mode or m_bool_estimate or m_int_max_indexed_lines is not None:
+                    return
+                self._bool_estimate_mode = m_bool_estimate
+                self._bool_index_loaded = False
 
         if self._bool_estimate_mode:
             self._int_num_lines = self._count_lines()
@@ -148,7 +634,7 @@ class FileSamplerBase(object):
             self._list_line_indexes = None
         else:
             try:
-                self._list_line_indexes = self._build_line_indexes()
+                self._list_line_indexes = self._build_line_indexes(m_int_max_indexed_lines)
             except AttributeError:
                 self._int_num_lines = self._count_lines()
                 self._int_avg_len = self._get_avg_len()
@@ -168,6 +654,10 @@ class FileSamplerBase(object):
     def estimate_mode(self):
         return self._bool_estimate_mode
 
+    @property
+    def index_loaded(self):
+        return self._bool_index_loaded
+
     def get_line_indexes(self):
         """
         returns the line indexs, which are a list of dictionaries
@@ -193,34 +683,300 @@ class FileSamplerBase(object):
         else:
             return range(0, len(self._list_line_indexes))
 
-    def _count_lines(self):
+    def save_line_indexes(self, m_string_index_path = None):
         """
-        counts the number of lines in the file
-        
+        saves the line indexes so the file does not need to be read again the next time it is sampled;
+        in estimate mode the number of lines and average line length are saved
+
         Requirements:
-        None
-    
+        package struct
+        package array
+
         Inputs:
-        None
-        Type: n/a
-        Desc: n/a
-        
+        m_string_index_path
+        Type: string
+        Desc: file path to save the index to; defaults to the file path with '.lineidx' added
+
         Important Info:
-        None
-    
+        the size and modification time of the file are saved with the index so a stale index
+        is not loaded; the index file is a fixed header followed by the byte offsets as little endian
+        64 bit integers, so loading it does not run any code
+
         Return:
         variable
-        Type: integer
-        Desc: number of lines in the file
+        Type: string
+        Desc: file path the index was saved to
         """
-        return sum(1 for line in open(self._string_filepath))
+        if m_string_index_path is None:
+            m_string_index_path = self._string_filepath + '.lineidx'
+
+        int_size, int_mtime_ns = self._get_file_signature()
+        bytes_header = self._struct_line_index_header.pack(self._bytes_line_index_magic, self._int_index_version,
+                                                           int_size, int_mtime_ns, self._bool_estimate_mode,
+                                                           self._int_num_lines, self._int_avg_len or 0)
+        with open(m_string_index_path, 'wb') as file:
+            file.write(bytes_header)
+            if not self._bool_estimate_mode:
+                if sys.byteorder == 'little':
+                    file.write(self._list_line_indexes.tobytes())
+                else:
+                    array_offsets = PackedArray('q')
+                    array_offsets.frombytes(self._list_line_indexes.tobytes())
+                    array_offsets.byteswap()
+                    array_offsets.tofile(file)
+        return m_string_index_path
+
+    def load_line_indexes(self, m_string_index_path = None):
+        """
+        loads line indexes saved with save_line_indexes()
+
+        Requirements:
+        package array
+        package struct
+
+        Inputs:
+        m_string_index_path
+        Type: string
+        Desc: file path of the saved index; defaults to the file path with '.lineidx' added
+
+        Important Info:
+        raises a ValueError if the file has changed since the index was saved, the index was saved
+        by an older version or the index file is not a line index or is corrupt
+
+        Return:
+        None
+        Type: n/a
+        Desc: n/a
+        """
+        if m_string_index_path is None:
+            m_string_index_path = self._string_filepath + '.lineidx'
+
+        tuple_signature = self._get_file_signature()
+        array_offsets = None
+        with open(m_string_index_path, 'rb') as file:
+            bytes_header = file.read(self._struct_line_index_header.size)
+            if len(bytes_header) != self._struct_line_index_header.size:
+                raise ValueError('line index file is corrupt; rebuild by creating a new sampler')
+            bytes_magic, int_version, int_size, int_mtime_ns, bool_estimate_mode, int_num_lines, int_avg_len = \
+                self._struct_line_index_header.unpack(bytes_header)
+
+            if bytes_magic != self._bytes_line_index_magic or int_version != self._int_index_version:
+                raise ValueError('line index was saved by an older version; rebuild by creating a new sampler')
+            if (int_size, int_mtime_ns) != tuple_signature:
+                raise ValueError('line index is out of date with the file; rebuild by creating a new sampler')
+            if int_num_lines < 0 or (bool_estimate_mode and int_avg_len < 1):
+                raise ValueError('line index file is corrupt; rebuild by creating a new sampler')
+
+            if not bool_estimate_mode:
+                # read the offsets straight into the array, without a second copy
+                array_offsets = PackedArray('q')
+                try:
+                    array_offsets.fromfile(file, int_num_lines + 1)
+                except EOFError:
+                    raise ValueError('line index file is corrupt; rebuild by creating a new sampler')
+                if sys.byteorder != 'little':
+                    array_offsets.byteswap()
+                if array_offsets[0] != 0 or array_offsets[-1] != int_size or file.read(1) != b'':
+                    raise ValueError('line index file is corrupt; rebuild by creating a new sampler')
+
+        self._bool_estimate_mode = bool_estimate_mode
+        self._int_num_lines = int_num_lines
+        self._int_avg_len = int_avg_len if bool_estimate_mode else None
+        self._list_line_indexes = None if bool_estimate_mode else LineIndexes(array_offsets)
+        self._bool_index_loaded = True
+
+    def share_line_indexes(self):
+        """
+        moves the line indexes into shared memory; after this pickling the sampler, eg. to send it
+        to the worker processes of a data loader, only pickles the name of the shared memory, so the 
+        memory for the index is only used once on the host
+
+        Requirements:
+        class SharedLineIndexes
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        1. the sampler that calls this method owns the shared memory and should call 
+            release_line_indexes() when all the processes are done with it
+        2. in estimate mode there are no line indexes to share
+        3. the file is opened on each read, so no file handles are pickled with the sampler
+
+        Return:
+        variable
+        Type: string
+        Desc: name of the shared memory block; None in estimate mode
+        """
+        if self._bool_estimate_mode:
+            return None
+
+        if not isinstance(self._list_line_indexes, SharedLineIndexes):
+            self._list_line_indexes = SharedLineIndexes.create(self._list_line_indexes)
+        return self._list_line_indexes.name
+
+    def release_line_indexes(self):
+        """
+        detaches from the shared memory of the line indexes and copies the indexes back into this process
+        so the sampler can still be used; the shared memory is freed if this sampler created it
+
+        Requirements:
+        class LineIndexes
+        class SharedLineIndexes
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        None
+
+        Return:
+        None
+        Type: n/a
+        Desc: n/a
+        """
+        if isinstance(self._list_line_indexes, SharedLineIndexes):
+            shared_indexes = self._list_line_indexes
+            array_offsets = PackedArray('q')
+            array_offsets.frombytes(shared_indexes.tobytes())
+            self._list_line_indexes = LineIndexes(array_offsets)
+            shared_indexes.close()
+            if shared_indexes.owner:
+                shared_indexes.unlink()
+
+    def iter_shard_line_numbers(self, m_int_seed, m_int_epoch, m_int_rank = 0, m_int_world_size = 1,
+        m_int_start = 0, m_int_first_line = 0):
+        """
+        yields the line numbers of one shard of the file in a shuffled order; the shards of all the 
+        ranks are disjoint and together cover every line once
+
+        Requirements:
+        class IndexPermutation
+
+        Inputs:
+        m_int_seed
+        Type: integer
+        Desc: seed of the shuffle, the same for all ranks
+
+        m_int_epoch
+        Type: integer
+        Desc: epoch number; each epoch is a different shuffle
+
+        m_int_rank
+        Type: integer
+        Desc: shard number of this worker, 0 to m_int_world_size - 1
+
+        m_int_world_size
+        Type: integer
+        Desc: number of shards / workers
+
+        m_int_start
+        Type: integer
+        Desc: number of line numbers of this shard to skip, to restart after the lines already consumed
+
+        m_int_first_line
+        Type: integer
+        Desc: first line number to shuffle, eg. 1 to skip the header of a csv file
+
+        Important Info:
+        1. shard lengths differ by at most 1 line
+        2. the line numbers are computed one at a time, the shuffled order is not held in memory
+
+        Return:
+        object
+        Type: generator
+        Desc: yields line numbers
+        """
+        if m_int_world_size < 1 or not 0 <= m_int_rank < m_int_world_size:
+            raise ValueError('rank must be between 0 and world size - 1')
+        if m_int_start < 0:
+            raise ValueError('start must be 0 or greater')
+
+        permutation = IndexPermutation(self.number_of_lines - m_int_first_line, m_int_seed, m_int_epoch)
+        for int_position in range(m_int_rank + m_int_start * m_int_world_size, len(permutation),
+                                  m_int_world_size):
+            yield m_int_first_line + permutation[int_position]
+
+    def _get_file_signature(self):
+        """
+        returns the size and modification time of the file; used to check if a saved index
+        still matches the file
+
+        Requirements:
+        package os
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        None
+
+        Return:
+        object
+        Type: tuple
+        Desc: (file size in bytes, modification time in nanoseconds)
+        """
+        stat_file = os.stat(self._string_filepath)
+        return (stat_file.st_size, stat_file.st_mtime_ns)
+
+    def _open_text(self):
+        """
+        opens the file for reading as text; lines only end at a line feed and are returned as they are 
+        in the file, eg. with '\r\n', so a line read at a byte offset of the line indexes is the whole line
+
+        Requirements:
+        None
+
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+
+        Important Info:
+        the default text mode also ends lines at a lone '\r', which splits lines the index does not
+
+        Return:
+        object
+        Type: file object
+        Desc: file opened as text for reading
+        """
+        return open(self._string_filepath, 'r', newline = '\n')
+
+    def _count_lines(self):
+        """
+        counts the number of lines in the file
+        
+        Requirements:
+        None
+    
+        Inputs:
+        None
+        Type: n/a
+        Desc: n/a
+        
+        Important Info:
+        the file is read in binary, so lines only end at a line feed, the same as the line indexes
+    
+        Return:
+        variable
+        Type: integer
+        Desc: number of lines in the file
+        """
+        with open(self._string_filepath, 'rb') as file:
+            return sum(1 for line in file)
 
     def _get_avg_len(self):
         """
         this method calculates the an average line length by sampling 1000 random lines from the file
     
         Requirements:
-        package numpy.mean
+        package random.randrange
     
         Inputs:
         None
@@ -228,21 +984,21 @@ class FileSamplerBase(object):
         Desc: n/a
         
         Important Info:
-        None
+        the length is in bytes, the same as the seeks which use it
     
         Return:
         variable
         Type: integer
         Desc: average length of the sample of lines
         """
-        with open(self._string_filepath, 'r') as file:
+        with open(self._string_filepath, 'rb') as file:
             # read first 10 lines
             list_lines = []
             for int_line_num in range(0, 10):
                 list_lines.append(len(file.readline()))
         
             # calc temp mean
-            int_temp_mean = int(mean(list_lines))
+            int_temp_mean = int(sum(list_lines) / len(list_lines))
         
             # get 1000 random lines to test
             list_random_lines = [randrange(0, self._int_num_lines) for x in range(0, 1000)]
@@ -262,49 +1018,47 @@ class FileSamplerBase(object):
                     file.readline()
                 list_len_1000_lines.append(len(file.readline()))
 
-        return int(mean(list_len_1000_lines))
+        return int(sum(list_len_1000_lines) / len(list_len_1000_lines))
 
-    def _build_line_indexes(self):
+    def _build_line_indexes(self, m_int_max_lines):
         """
-        this method calculates the character index, integer, of the start of the line and the line length of 
-        each line in the file; if the file is more than 1 million rows the method will only count the number
-        of rowsand switch to an estimation mode
+        this method finds the byte offset of the start of each line in the file; the file is read in binary
+        so the offsets are the same for any line ending; if the file is more than m_int_max_lines rows the 
+        method will stop and the caller switches to an estimation mode
     
         Requirements:
-        None
+        class LineIndexes
+        package array
     
         Inputs:
-        None
+        m_int_max_lines
+        Type: integer
+        Desc: most lines to index; None for no limit
         
         Important Info:
         None
     
         Return:
         object
-        Type: list of dictionaries
-        Desc: each dictionary contines the character number for the start of the line and the length of the line; 
-            the index of the list is the line number starting at 0; this is only if the number of lines in the file
-            is less than 1 million
+        Type: LineIndexes
+        Desc: byte offset of the start of each line, indexed like a list of dictionaries
         _list_line_indexes[x] -> {'start': <integer>, 'length':<integer>}
         
         eg: _list_line_indexes[3] -> {'start':57, 'length':23}
         """
-        list_lines = list()
-        int_line_count = 1
+        array_offsets = PackedArray('q', [0])
         int_start_posit = 0
 
-        with open(self._string_filepath, 'r') as file:
-            for string_line in file:
-                int_line_length = len(string_line)
-                list_lines.append({'start':int_start_posit, 'length':int_line_length})
-                int_start_posit += int_line_length + 1
+        with open(self._string_filepath, 'rb') as file:
+            for bytes_line in file:
+                int_start_posit += len(bytes_line)
+                array_offsets.append(int_start_posit)
 
                 # check line count
-                if int_line_count > 1000000:
-                    raise AttributeError('surpassed line count threashold; 1000000')
-                int_line_count += 1
+                if m_int_max_lines is not None and len(array_offsets) - 1 > m_int_max_lines:
+                    raise AttributeError('surpassed line count threashold; ' + str(m_int_max_lines))
 
-        return list_lines
+        return LineIndexes(array_offsets)
 
 class TextSampler(FileSamplerBase):
     """
@@ -321,6 +1075,24 @@ class TextSampler(FileSamplerBase):
 
     get_random_lines():
     retrieves random lines from the text file, returns a list of strings
+
+    iter_shard_batches():
+    retrieves the lines of a shard of the file in shuffled batches, yields lists of strings
+
+    sample_design
+    property, describes how the last random sample was drawn
+
+    get_random_blocks():
+    retrieves random runs of consecutive lines from the text file, returns a list of strings
+
+    _get_random_block_lines():
+    reads random blocks of lines, shared by the text and csv block sampling
+
+    _get_random_byte_block_lines():
+    reads random blocks of bytes in estimate mode
+
+    _read_lines():
+    reads multiple lines with one file handle, without a limit on the number of lines
     """
 
     def __init__(self, m_string_filepath, **kwargs):
@@ -340,13 +1112,27 @@ class TextSampler(FileSamplerBase):
         Desc: parameters to pass to FileSamplerBase
         m_string_endline_character -> type: string; the endline character for the csv engine
         m_bool_estimate -> type: boolean; flag to toggle estimate mode
+        m_bool_use_saved_index -> type: boolean; flag to load the line indexes saved with save_line_indexes()
+        m_int_max_indexed_lines -> type: integer; files with more lines are sampled in estimate mode, None for no limit
         
         Important Info:
         None
+
+        Objects and Properties:
+        _dict_sample_design
+        Type: dictionary
+        Desc: describes how the last random sample was drawn; None if no random sample has been drawn
         """
         super().__init__(m_string_filepath,
                                    kwargs.get('m_string_endline_character', '\n'),
-                                   kwargs.get('m_bool_estimate', False))
+                                   kwargs.get('m_bool_estimate', False),
+                                   kwargs.get('m_bool_use_saved_index', False),
+                                   kwargs.get('m_int_max_indexed_lines', 1000000))
+        self._dict_sample_design = None
+
+    @property
+    def sample_design(self):
+        return self._dict_sample_design
 
     def get_a_line(self, m_int_line_number):
         '''
@@ -368,21 +1154,8 @@ class TextSampler(FileSamplerBase):
         Type: string
         Desc: line desired from the text file
         '''
-        with open(self._string_filepath, 'r') as file:
-            if self._bool_estimate_mode:
-                if m_int_line_number == 0:
-                    int_line_start = 0
-                else:
-                    int_line_start = m_int_line_number * self._int_avg_len - int(0.5 * self._int_avg_len)
-
-                file.seek(int_line_start)
-                if m_int_line_number != 0:
-                    file.readline()
-                return file.readline()
-            else:
-                dict_line_data = self._list_line_indexes[m_int_line_number]
-                file.seek(dict_line_data['start'])
-                return file.read(dict_line_data['length'])
+        with self._open_text() as file:
+            return self._read_a_line(file, m_int_line_number)
 
     def get_lines(self, m_list_line_numbers):
         '''
@@ -409,11 +1182,7 @@ class TextSampler(FileSamplerBase):
             string_error +=  'length of input list is too long'
             raise ValueError(string_error)
 
-        list_return = list()
-
-        for int_line in m_list_line_numbers:
-            list_return.append(self.get_a_line(int_line))
-        return list_return
+        return self._read_lines(m_list_line_numbers)
 
     def get_random_lines(self, m_int_number_of_lines):
         '''
@@ -439,94 +1208,539 @@ class TextSampler(FileSamplerBase):
             raise ValueError('number of lines requested is more than the number of lines in the file')
 
         list_line_numbers = [randrange(0, self.number_of_lines) for x in range(0, m_int_number_of_lines)]
+        self._dict_sample_design = {'design': 'simple random with replacement',
+                                    'number_of_lines': m_int_number_of_lines}
         return self.get_lines(list_line_numbers)
 
-class CsvSampler(TextSampler):
-    """
-    CsvSampler class
+    def get_random_blocks(self, m_int_number_of_lines, m_int_block_size, m_bool_shuffle = False,
+        m_int_seed = None):
+        '''
+        this method retrieves random blocks of consecutive lines from the text file; each block is read 
+        with one seek, so a sample needs about m_int_block_size times fewer seeks than get_random_lines()
 
-    __init__():
-    constructor, takes the file path, flag to toggle if the csv file has a header, flag to toggle 
-    ignoring bad lines; inputs for the TextSampler and base classes through keywords
+        Requirements:
+        class IndexPermutation
+        package random.Random
 
-    header
-    property, returns the header of the csv file if it exists
+        Inputs:
+        m_int_number_of_lines
+        Type: int
+        Desc: number of lines to sample
 
-    has_header
-    property, returns boolean if the file has a header
+        m_int_block_size
+        Type: int
+        Desc: number of consecutive lines in a block
 
-    set_headers():
-    sets the headers of the csv
+        m_bool_shuffle
+        Type: boolean
+        Desc: flag to shuffle the lines of the sample; if False the lines are in the order of the file
 
-    get_a_csv_line():
-    retrieves one line from the csv file, returns pandas series
+        m_int_seed
+        Type: int
+        Desc: seed for the random generator; None for a random seed
 
-    get_csv_lines():
-    retreives multiple lines from the csv file, returns pandas dataframe
+        Important Info:
+        1. the file is split into blocks starting at line 0 and blocks are sampled without replacement, so
+            no line is in the sample twice; the last block of the file can be shorter
+        2. lines in the same block are not independent, sample_design reports the blocks drawn
+        3. in estimate mode the line numbers are not known, so the file is split into blocks of
+            m_int_block_size times the average line length in bytes; a block is the lines which start in 
+            its bytes, so the number of lines in a block varies
     
-    get_csv_random_lines():
-    retreives random lines from the csv file, returns pandas dataframe
+        Return:
+        object
+        Type: list
+        Desc: strings represent the lines desired in text file
+        '''
+        return self._get_random_block_lines(m_int_number_of_lines, m_int_block_size, m_bool_shuffle,
+                                            m_int_seed, 0)
 
-    _csv_trans():
-    supports the decoding of the csv line to a string
+    def _get_random_block_lines(self, m_int_number_of_lines, m_int_block_size, m_bool_shuffle, m_int_seed,
+        m_int_first_line):
+        '''
+        this method draws random blocks of lines and reads each block with one seek and sequential reads
 
-    _parse_csv_values():
-    converts the text line of csv, returns a tuple
-    """
+        Requirements:
+        class IndexPermutation
+        package random.Random
 
-    def __init__(self, m_string_filepath, m_bool_has_header=True,
-                m_bool_ignore_bad_lines = False, **kwargs):
-        """
-        this method initialized CsvSampler class, which calls the super() class, TextSampler();
+        Inputs:
+        m_int_number_of_lines, m_int_block_size, m_bool_shuffle, m_int_seed
+        Type: int, int, boolean, int
+        Desc: see get_random_blocks()
+
+        m_int_first_line
+        Type: int
+        Desc: line number the first block starts on, eg. 1 to skip the header of a csv file
+        
+        Important Info:
+        in estimate mode the blocks are byte ranges, see _get_random_byte_block_lines()
+    
+        Return:
+        object
+        Type: list
+        Desc: strings represent the lines desired in text file
+        '''
+        int_num_data_lines = self.number_of_lines - m_int_first_line
+        if m_int_number_of_lines > int_num_data_lines:
+            raise ValueError('number of lines requested is more than the number of lines in the file')
+        if m_int_block_size < 1:
+            raise ValueError('block size must be 1 or greater')
+
+        rng = Random(m_int_seed)
+        if self._bool_estimate_mode:
+            return self._get_random_byte_block_lines(m_int_number_of_lines, m_int_block_size, m_bool_shuffle,
+                                                     rng, m_int_first_line)
+
+        int_num_blocks = -(-int_num_data_lines // m_int_block_size)
+        permutation = IndexPermutation(int_num_blocks, rng.getrandbits(64))
+
+        # draw blocks until there are enough lines; the last block drawn is cut to the lines still needed
+        dict_block_lengths = dict()
+        int_lines_needed = m_int_number_of_lines
+        int_position = 0
+        while int_lines_needed > 0:
+            int_block_start = m_int_first_line + permutation[int_position] * m_int_block_size
+            int_block_length = min(m_int_block_size, self.number_of_lines - int_block_start, int_lines_needed)
+            dict_block_lengths[int_block_start] = int_block_length
+            int_lines_needed -= int_block_length
+            int_position += 1
+
+        # read the blocks in file order; one seek to the byte offset of the block then sequential reads
+        list_return = list()
+        with self._open_text() as file:
+            for int_block_start in sorted(dict_block_lengths):
+                file.seek(self._list_line_indexes[int_block_start]['start'])
+                for int_line in range(0, dict_block_lengths[int_block_start]):
+                    list_return.append(file.readline())
+
+        if m_bool_shuffle:
+            rng.shuffle(list_return)
+
+        self._dict_sample_design = {'design': 'block random without replacement',
+                                    'number_of_lines': len(list_return),
+                                    'block_size': m_int_block_size,
+                                    'number_of_blocks': len(dict_block_lengths),
+                                    'block_starts': sorted(dict_block_lengths),
+                                    'shuffled': m_bool_shuffle}
+        return list_return
+
+    def _get_random_byte_block_lines(self, m_int_number_of_lines, m_int_block_size, m_bool_shuffle, m_rng,
+        m_int_first_line):
+        '''
+        this method draws random blocks of bytes, for estimate mode where the start of a line is only known
+        by reading; a block holds the lines which start in its bytes, so every line is in one block only
 
         Requirements:
-        class TextSampler()
+        class IndexPermutation
+        package os
 
         Inputs:
-        m_string_filepath
-        Type: string
-        Desc: absolute file path, includes file name
-
-        m_bool_has_header
-        Type: boolean
-        Desc: flag to toggle parsing the header
+        m_int_number_of_lines, m_int_block_size, m_bool_shuffle
+        Type: int, int, boolean
+        Desc: see get_random_blocks()
 
-        m_bool_ignore_bad_lines
-        Type: boolean
-        Desc: flag to toggle the check the length of the data line is the same length as the header
+        m_rng
+        Type: random.Random
+        Desc: random generator
 
-        kwargs
-        Type: dictionary
-        Desc: parameters to pass to TextSampler() if desired
-        m_string_endline_character -> type: string; the endline character for the csv engine
-        m_bool_estimate -> type: boolean; flag to toggle estimate mode
+        m_int_first_line
+        Type: int
+        Desc: number of lines at the start of the file not to sample, eg. 1 to skip the header of a csv file
 
         Important Info:
-        None
+        a block is m_int_block_size times the average line length in bytes; if the blocks drawn run out of 
+        lines the sample can be shorter than m_int_number_of_lines; sample_design reports the byte offsets
+        of the blocks
 
-        Objects and Properties:
-        _tuple_header
-        Type: tuple
-        Desc: header from the csv file
+        Return:
+        object
+        Type: list
+        Desc: strings represent the lines desired in text file
+        '''
+        # decode the lines the same way the file is read in text mode
+        with self._open_text() as file:
+            string_encoding = file.encoding
+
+        int_file_size = os.path.getsize(self._string_filepath)
+        int_block_bytes = max(m_int_block_size * self._int_avg_len, 1)
+        dict_block_lines = dict()
+
+        with open(self._string_filepath, 'rb') as file:
+            for int_line in range(0, m_int_first_line):
+                file.readline()
+            int_first_offset = file.tell()
+
+            int_num_blocks = -(-(int_file_size - int_first_offset) // int_block_bytes)
+            permutation = IndexPermutation(int_num_blocks, m_rng.getrandbits(64))
+
+            # draw blocks until there are enough lines; the last block drawn is cut to the lines still needed
+            int_lines_needed = m_int_number_of_lines
+            int_position = 0
+            while int_lines_needed > 0 and int_position < int_num_blocks:
+                int_block_offset = int_first_offset + permutation[int_position] * int_block_bytes
+                int_block_end = int_block_offset + int_block_bytes
+
+                # one seek, then skip the end of the line which started before the block
+                if int_block_offset == int_first_offset:
+                    file.seek(int_block_offset)
+                else:
+                    file.seek(int_block_offset - 1)
+                    file.readline()
 
-        _string_delimiter
-        Type: string
-        Desc: column delimiter in csv file
+                list_lines = list()
+                while len(list_lines) < int_lines_needed and file.tell() < int_block_end:
+                    bytes_line = file.readline()
+                    if bytes_line == b'':
+                        break
+                    list_lines.append(bytes_line.decode(string_encoding))
 
-        _string_quotechar
-        Type: string
-        Desc: quote character for csv file
+                dict_block_lines[int_block_offset] = list_lines
+                int_lines_needed -= len(list_lines)
+                int_position += 1
 
-        _bool_has_header
-        Type: boolean
-        Desc: flag to indicate of csv file has header
+        list_return = list()
+        for int_block_offset in sorted(dict_block_lines):
+            list_return.extend(dict_block_lines[int_block_offset])
+
+        if m_bool_shuffle:
+            m_rng.shuffle(list_return)
+
+        self._dict_sample_design = {'design': 'byte block random without replacement',
+                                    'number_of_lines': len(list_return),
+                                    'block_size': m_int_block_size,
+                                    'block_bytes': int_block_bytes,
+                                    'number_of_blocks': len(dict_block_lines),
+                                    'block_start_offsets': sorted(dict_block_lines),
+                                    'shuffled': m_bool_shuffle}
+        return list_return
 
-        _bool_ignore_bad_lines
-        Type: boolean
-        Desc: flag to toggle the check if the data line is the same length as the header
+    def iter_shard_batches(self, m_int_batch_size, m_int_seed, m_int_epoch, m_int_rank = 0,
+        m_int_world_size = 1, m_int_start = 0):
+        '''
+        this method retrieves the lines of one shard of the file in a shuffled order, in batches; 
+        see iter_shard_line_numbers() for the shuffle and sharding
+
+        Requirements:
+        class FileSamplerBase
+
+        Inputs:
+        m_int_batch_size
+        Type: int
+        Desc: number of lines in each batch; the last batch can be smaller
+
+        m_int_seed, m_int_epoch, m_int_rank, m_int_world_size, m_int_start
+        Type: int
+        Desc: passed to iter_shard_line_numbers()
+
+        Important Info:
+        to restart after a crash pass the number of lines already consumed as m_int_start
+
+        Return:
+        object
+        Type: generator
+        Desc: yields lists of strings
+        '''
+        for list_line_numbers in self._iter_batches(self.iter_shard_line_numbers(m_int_seed, m_int_epoch,
+                m_int_rank, m_int_world_size, m_int_start), m_int_batch_size):
+            yield self.get_lines(list_line_numbers)
+
+    def _iter_batches(self, m_iter_line_numbers, m_int_batch_size):
+        '''
+        this method groups line numbers into lists
+
+        Requirements:
+        None
+
+        Inputs:
+        m_iter_line_numbers
+        Type: iterator
+        Desc: line numbers
+
+        m_int_batch_size
+        Type: int
+        Desc: number of line numbers in each list
+
+        Important Info:
+        None
+
+        Return:
+        object
+        Type: generator
+        Desc: yields lists of line numbers
+        '''
+        if m_int_batch_size < 1:
+            raise ValueError('batch size must be 1 or greater')
+
+        list_batch = list()
+        for int_line_number in m_iter_line_numbers:
+            list_batch.append(int_line_number)
+            if len(list_batch) == m_int_batch_size:
+                yield list_batch
+                list_batch = list()
+        if list_batch:
+            yield list_batch
+
+    def _read_lines(self, m_list_line_numbers, m_bool_bytes = False):
+        '''
+        this method reads multiple lines from the text file with one file handle; unlike get_lines() 
+        there is no limit on the number of line numbers, so line numbers can repeat, eg. a sample with 
+        replacement larger than the file
+
+        Requirements:
+        class FileSamplerBase
+
+        Inputs:
+        m_list_line_numbers
+        Type: list
+        Desc: integers of lines to retrieve
+
+        m_bool_bytes
+        Type: boolean
+        Desc: flag to read the lines as bytes, exactly as they are in the file, without decoding them
+
+        Important Info:
+        each unique line is read once, in file order, so the seeks move forward through the file
+
+        Return:
+        object
+        Type: list
+        Desc: strings represent the lines desired in text file; bytes if m_bool_bytes is True
+        '''
+        dict_lines = dict()
+        with (open(self._string_filepath, 'rb') if m_bool_bytes else self._open_text()) as file:
+            for int_line in sorted(set(m_list_line_numbers)):
+                dict_lines[int_line] = self._read_a_line(file, int_line)
+
+        return [dict_lines[int_line] for int_line in m_list_line_numbers]
+
+    def _read_a_line(self, m_file, m_int_line_number):
+        '''
+        this method reads a line from an open text file; it is shared by get_a_line() and get_lines()
+        so multiple lines can be read with one file handle
+
+        Requirements:
+        class FileSamplerBase
+
+        Inputs:
+        m_file
+        Type: file object
+        Desc: text file opened for reading with _open_text(), or the file opened in binary to read bytes
+
+        m_int_line_number
+        Type: int
+        Desc: line number of the file
+
+        Important Info:
+        None
+
+        Return:
+        variable
+        Type: string or bytes
+        Desc: line desired from the text file
+        '''
+        if self._bool_estimate_mode:
+            if m_int_line_number == 0:
+                int_line_start = 0
+            else:
+                int_line_start = m_int_line_number * self._int_avg_len - int(0.5 * self._int_avg_len)
+
+            m_file.seek(int_line_start)
+            if m_int_line_number != 0:
+                m_file.readline()
+            return m_file.readline()
+        else:
+            # the index holds byte offsets; seeking a text file to the start of a line resets the decoder
+            m_file.seek(self._list_line_indexes[m_int_line_number]['start'])
+            return m_file.readline()
+
+class CsvSampler(TextSampler):
+    """
+    CsvSampler class
+
+    __init__():
+    constructor, takes the file path, flag to toggle if the csv file has a header, flag to toggle 
+    ignoring bad lines; inputs for the TextSampler and base classes through keywords
+
+    header
+    property, returns the header of the csv file if it exists
+
+    has_header
+    property, returns boolean if the file has a header
+
+    result_backend
+    property, returns the name of the result backend
+
+    set_headers():
+    sets the headers of the csv
+
+    get_a_csv_line():
+    retrieves one line from the csv file, returns pandas series
+
+    get_csv_lines():
+    retreives multiple lines from the csv file, returns pandas dataframe
+    
+    get_csv_random_lines():
+    retreives random lines from the csv file, returns pandas dataframe
+
+    get_csv_random_blocks():
+    retreives random runs of consecutive lines from the csv file, returns pandas dataframe
+
+    iter_csv_shard_batches():
+    retrieves the lines of a shard of the csv file in shuffled batches, yields pandas dataframes
+
+    key_columns
+    property, returns the columns of the key index if it has been built
+
+    build_key_index():
+    maps the values of one or more columns to the byte offsets of the rows they occur on
+
+    save_key_index():
+    saves the key index to a file next to the csv file
+
+    load_key_index():
+    loads a key index saved by save_key_index()
+
+    get_csv_rows_by_key():
+    retrieves the lines which match the keys, returns pandas dataframe
+
+    build_strata_index():
+    groups the line numbers by the value of a column
+
+    get_csv_stratified_lines():
+    retrieves random lines from each stratum, returns pandas dataframe
+
+    build_weights_index():
+    builds the cumulative weights of a numeric column
+
+    get_csv_weighted_lines():
+    retrieves random lines in proportion to their weight, returns pandas dataframe
+
+    _iter_csv_rows():
+    reads the data lines of the csv file in one pass
+
+    _iter_decoded_lines():
+    decodes the lines of the file and tracks their byte offsets
+
+    _read_records_at_offsets():
+    reads the csv rows which start at byte offsets, including rows which span several lines
+
+    _iter_record_lines():
+    reads the lines of a csv row and keeps them
+
+    _build_result():
+    parses text lines of the csv file into the result backend
+
+    _get_column_positions():
+    converts column names or positions to a tuple of positions
+
+    _csv_trans():
+    supports the decoding of the csv line to a string
+
+    _parse_csv_values():
+    converts the text line of csv, returns a tuple
+    """
+
+    _tuple_result_backends = ('pandas', 'tuples', 'dicts', 'numpy', 'arrow')
+
+    # header of a saved key index: file type, version, file size, file modification time in nanoseconds,
+    # length of the json of the key columns and keys, number of keys, number of byte offsets; the number
+    # of offsets of each key and then the offsets follow as 64 bit integers
+    _bytes_key_index_magic = b'FSKEYIDX'
+    _struct_key_index_header = struct.Struct('<8sqqqqqq')
+
+    def __init__(self, m_string_filepath, m_bool_has_header=True,
+                m_bool_ignore_bad_lines = False, **kwargs):
+        """
+        this method initialized CsvSampler class, which calls the super() class, TextSampler();
+
+        Requirements:
+        class TextSampler()
+
+        Inputs:
+        m_string_filepath
+        Type: string
+        Desc: absolute file path, includes file name
+
+        m_bool_has_header
+        Type: boolean
+        Desc: flag to toggle parsing the header
+
+        m_bool_ignore_bad_lines
+        Type: boolean
+        Desc: flag to toggle the check the length of the data line is the same length as the header
+
+        kwargs
+        Type: dictionary
+        Desc: parameters to pass to TextSampler() if desired
+        m_string_endline_character -> type: string; the endline character for the csv engine
+        m_bool_estimate -> type: boolean; flag to toggle estimate mode
+        m_bool_use_saved_index -> type: boolean; flag to load the line indexes saved with save_line_indexes()
+        m_int_max_indexed_lines -> type: integer; files with more lines are sampled in estimate mode, None for no limit
+        string_values_delimiter -> type: string; column delimiter in csv file
+        string_quotechar -> type: string; quote character for csv file
+        string_result_backend -> type: string; format of the lines returned; 'pandas' (default), 'tuples',
+            'dicts', 'numpy' or 'arrow'
+
+        Important Info:
+        None
+
+        Objects and Properties:
+        _tuple_header
+        Type: tuple
+        Desc: header from the csv file
+
+        _string_delimiter
+        Type: string
+        Desc: column delimiter in csv file
+
+        _string_quotechar
+        Type: string
+        Desc: quote character for csv file
+
+        _bool_has_header
+        Type: boolean
+        Desc: flag to indicate of csv file has header
+
+        _bool_ignore_bad_lines
+        Type: boolean
+        Desc: flag to toggle the check if the data line is the same length as the header
+
+        _string_result_backend
+        Type: string
+        Desc: format of the lines returned; see _build_result()
+
+        _tuple_key_columns
+        Type: tuple
+        Desc: positions of the columns used to build the key index
+
+        _dict_key_index
+        Type: dictionary
+        Desc: maps the key to a list of the byte offsets of the rows the key is on; the key is the 
+            value of the column if one column is indexed or a tuple of values if multiple columns are indexed
+        _dict_key_index[key] -> [<integer>, <integer>, ...]
+
+        eg: _dict_key_index['cust_0042'] -> [517, 130456]
+
+        _dict_strata_index
+        Type: dictionary
+        Desc: maps the value of the stratified column to a numpy array of the byte offsets of the rows with the value
+
+        _array_weight_offsets
+        Type: numpy array
+        Desc: byte offsets of the rows which have a weight
+
+        _array_cum_weights
+        Type: numpy array
+        Desc: cumulative sum of the weights, in the same order as _array_weight_offsets
         """
         dict_args = {'m_string_endline_character': kwargs.get('m_string_endline_character', '\n'),
-                     'm_bool_estimate': kwargs.get('m_bool_estimate', False)}
+                     'm_bool_estimate': kwargs.get('m_bool_estimate', False),
+                     'm_bool_use_saved_index': kwargs.get('m_bool_use_saved_index', False),
+                     'm_int_max_indexed_lines': kwargs.get('m_int_max_indexed_lines', 1000000)}
+
+        if kwargs.get('string_result_backend', 'pandas') not in self._tuple_result_backends:
+            raise ValueError('result backend must be one of ' + ', '.join(self._tuple_result_backends))
 
         super(CsvSampler, self).__init__(m_string_filepath, **dict_args)
         self._tuple_header = None
@@ -534,6 +1748,12 @@ class CsvSampler(TextSampler):
         self._string_quotechar = kwargs.get('string_quotechar', '"')
         self._bool_has_header = m_bool_has_header
         self._bool_ignore_bad_lines = m_bool_ignore_bad_lines
+        self._string_result_backend = kwargs.get('string_result_backend', 'pandas')
+        self._tuple_key_columns = None
+        self._dict_key_index = None
+        self._dict_strata_index = None
+        self._array_weight_offsets = None
+        self._array_cum_weights = None
 
         if self.has_header:
             self._tuple_header = self._csv_trans(self.get_a_line(0))
@@ -546,6 +1766,14 @@ class CsvSampler(TextSampler):
     def has_header(self):
         return self._bool_has_header
 
+    @property
+    def result_backend(self):
+        return self._string_result_backend
+
+    @property
+    def key_columns(self):
+        return self._tuple_key_columns
+
     def _csv_trans(self, m_string_line):
         """
         this method supports the transition of the text line in the csv format
@@ -587,7 +1815,7 @@ class CsvSampler(TextSampler):
         Desc: line to translate into a csv format
         
         Important Info:
-        None
+        if the file has no header the length of the line is not checked
     
         Return:
         object
@@ -595,7 +1823,7 @@ class CsvSampler(TextSampler):
         Desc: line split into segments based on csv format
         """
         values = self._csv_trans(m_string_line)
-        if len(self.header) != len(values):
+        if self.header is not None and len(self.header) != len(values):
             if not self._bool_ignore_bad_lines:
                 raise ValueError("Corrupt csv - header and row have different lengths")
             return None
@@ -640,18 +1868,31 @@ class CsvSampler(TextSampler):
         Desc: the line number to pull from the file
         
         Important Info:
-        None
+        with a result backend other than pandas the line is returned as a tuple, a dict or a numpy
+        record; the arrow backend returns a table with one row; if the line does not fit the csv format
+        and bad lines are ignored None is returned for every backend
     
         Return:
         object
-        Type: pandas Series
+        Type: pandas Series, or the row type of the result backend
         Desc: the line as a pandas series
         """
         if self.has_header:
             m_int_line_number += 1
         
         string_line = self.get_a_line(m_int_line_number)
+
+        if self._string_result_backend != 'pandas':
+            result = self._build_result([string_line])
+            if len(result) == 0:
+                return None
+            return result if self._string_result_backend == 'arrow' else result[0]
+
+        from pandas import Series
+
         tup_values = self._parse_csv_values(string_line)
+        if tup_values is None:
+            return None
         
         if self.has_header:
             return Series(data = tup_values, index = self.header)
@@ -677,7 +1918,7 @@ class CsvSampler(TextSampler):
     
         Return:
         object
-        Type: pandas DataFrame
+        Type: pandas DataFrame, or the type of the result backend
         Desc: dataframe with the lines in the columns
         """
         if len(m_list_line_numbers) > self.number_of_lines:
@@ -685,15 +1926,7 @@ class CsvSampler(TextSampler):
             string_error +=  'length of input list is too long'
             raise ValueError(string_error)
 
-        list_data = list()
-        list_lines = self.get_lines(m_list_line_numbers)
-        for string_line in list_lines:
-            list_data.append(self._parse_csv_values(string_line))
-
-        if self.has_header:
-            return DataFrame(data = list_data, columns = self.header)
-        else:
-            return DataFrame(data = list_data)
+        return self._build_result(self.get_lines(m_list_line_numbers))
 
     def get_csv_random_lines(self, m_int_num_lines):
         """
@@ -713,15 +1946,751 @@ class CsvSampler(TextSampler):
     
         Return:
         object
-        Type: pandas DataFrame
+        Type: pandas DataFrame, or the type of the result backend
         Desc: dataframe with of the lines from the csv file
         """
         if m_int_num_lines > self.number_of_lines:
             raise ValueError('Number of lines requestes is greater than the number of lines in the file')
 
         list_line_numbers = [randrange(0, self.number_of_lines) for x in range(0, m_int_num_lines)]
+        self._dict_sample_design = {'design': 'simple random with replacement',
+                                    'number_of_lines': m_int_num_lines}
         return self.get_csv_lines(list_line_numbers)
 
+    def get_csv_random_blocks(self, m_int_num_lines, m_int_block_size, m_bool_shuffle = False,
+        m_int_seed = None):
+        """
+        this method finds random blocks of consecutive lines in the csv file; each block is read with 
+        one seek; the header is not part of any block; see TextSampler.get_random_blocks()
+    
+        Requirements:
+        package pandas.DataFrame
+    
+        Inputs:
+        m_int_num_lines
+        Type: int
+        Desc: number of lines to sample
+
+        m_int_block_size
+        Type: int
+        Desc: number of consecutive lines in a block
+
+        m_bool_shuffle
+        Type: boolean
+        Desc: flag to shuffle the lines of the sample; if False the lines are in the order of the file
+
+        m_int_seed
+        Type: int
+        Desc: seed for the random generator; None for a random seed
+        
+        Important Info:
+        sample_design reports the blocks drawn
+    
+        Return:
+        object
+        Type: pandas DataFrame, or the type of the result backend
+        Desc: dataframe with of the lines from the csv file
+        """
+        int_first_line = 1 if self.has_header else 0
+        return self._build_result(self._get_random_block_lines(m_int_num_lines, m_int_block_size,
+                                        m_bool_shuffle, m_int_seed, int_first_line))
+
+    def _build_result(self, m_list_lines):
+        """
+        this method parses text lines of the csv file and builds the result for the result backend; if 
+        there is no header the columns will not have names, only numbers
+    
+        Requirements:
+        package pandas.DataFrame for the pandas backend
+        package numpy for the numpy backend
+        package pyarrow for the arrow backend
+    
+        Inputs:
+        m_list_lines
+        Type: list
+        Desc: strings of the lines from the csv file
+        
+        Important Info:
+        1. tuples -> list of tuples; the parsed lines, nothing else is built
+        2. dicts -> list of dictionaries; column name -> value
+        3. numpy -> numpy structured array; one string field per column
+        4. arrow -> pyarrow Table; one string column per column
+        5. pandas -> pandas DataFrame
+        lines which are ignored because they do not fit the csv format are not in the result, so it 
+        can have fewer rows than lines
+    
+        Return:
+        object
+        Type: list, numpy structured array, pyarrow Table or pandas DataFrame
+        Desc: the lines in the format of the result backend
+        """
+        # lines ignored as bad are dropped for every backend
+        list_data = list()
+        for string_line in m_list_lines:
+            tup_values = self._parse_csv_values(string_line)
+            if tup_values is not None:
+                list_data.append(tup_values)
+
+        if self._string_result_backend == 'tuples':
+            return list_data
+
+        if self.has_header:
+            list_columns = list(self.header)
+        else:
+            int_num_columns = max([len(tup_values) for tup_values in list_data] or [0])
+            list_columns = list(range(0, int_num_columns))
+
+        if self._string_result_backend == 'dicts':
+            return [dict(zip(list_columns, tup_values)) for tup_values in list_data]
+
+        if self._string_result_backend == 'numpy':
+            from numpy import array
+
+            list_dtype = list()
+            for int_column, column in enumerate(list_columns):
+                int_max_len = max([len(tup_values[int_column]) for tup_values in list_data] or [0])
+                list_dtype.append((str(column) if self.has_header else 'f' + str(column),
+                                   'U' + str(max(int_max_len, 1))))
+            return array(list_data, dtype = list_dtype)
+
+        if self._string_result_backend == 'arrow':
+            import pyarrow
+
+            return pyarrow.table({str(column): [tup_values[int_column] for tup_values in list_data]
+                                  for int_column, column in enumerate(list_columns)})
+
+        from pandas import DataFrame
+
+        if self.has_header:
+            return DataFrame(data = list_data, columns = self.header)
+        else:
+            return DataFrame(data = list_data)
+
+    def iter_csv_shard_batches(self, m_int_batch_size, m_int_seed, m_int_epoch, m_int_rank = 0,
+        m_int_world_size = 1, m_int_start = 0):
+        """
+        this method retrieves the lines of one shard of the csv file in a shuffled order, in batches;
+        the header is not part of any shard; see iter_shard_line_numbers() for the shuffle and sharding
+
+        Requirements:
+        package pandas.DataFrame
+
+        Inputs:
+        m_int_batch_size
+        Type: int
+        Desc: number of lines in each batch; the last batch can be smaller
+
+        m_int_seed, m_int_epoch, m_int_rank, m_int_world_size, m_int_start
+        Type: int
+        Desc: passed to iter_shard_line_numbers()
+
+        Important Info:
+        to restart after a crash pass the number of lines already consumed as m_int_start
+
+        Return:
+        object
+        Type: generator
+        Desc: yields pandas dataframes, or the type of the result backend
+        """
+        int_first_line = 1 if self.has_header else 0
+        for list_line_numbers in self._iter_batches(self.iter_shard_line_numbers(m_int_seed, m_int_epoch,
+                m_int_rank, m_int_world_size, m_int_start, int_first_line), m_int_batch_size):
+            yield self.get_csv_lines(list_line_numbers)
+
+    def build_key_index(self, m_list_key_columns):
+        """
+        this method reads the csv file once and maps the values in the key columns to the 
+        byte offsets of the rows they occur on so rows can be retrieved by key with get_csv_rows_by_key()
+
+        Requirements:
+        package csv
+
+        Inputs:
+        m_list_key_columns
+        Type: string, int or list
+        Desc: column name(s) or position(s) to build the key from; column names can only be used
+            if the csv file has a header
+
+        Important Info:
+        1. the offsets are the byte offsets of the start of the rows, so the rows are read directly and
+            are exact in estimate mode as well
+        2. if one column is used the key is the value of the column, if multiple columns are used the 
+            key is a tuple of the values
+
+        Return:
+        object
+        Type: dictionary
+        Desc: the key index; key -> list of byte offsets
+        """
+        tuple_key_columns = self._get_column_positions(m_list_key_columns)
+        bool_single_key = len(tuple_key_columns) == 1
+        dict_key_index = dict()
+
+        for int_line_number, int_offset, list_values in self._iter_csv_rows(max(tuple_key_columns)):
+            if bool_single_key:
+                key = list_values[tuple_key_columns[0]]
+            else:
+                key = tuple(list_values[int_column] for int_column in tuple_key_columns)
+            dict_key_index.setdefault(key, list()).append(int_offset)
+
+        self._tuple_key_columns = tuple_key_columns
+        self._dict_key_index = dict_key_index
+        return dict_key_index
+
+    def save_key_index(self, m_string_index_path = None):
+        """
+        this method saves the key index so it does not need to be rebuilt the next time the
+        file is sampled
+
+        Requirements:
+        package json
+        package struct
+        package array
+
+        Inputs:
+        m_string_index_path
+        Type: string
+        Desc: file path to save the index to; defaults to the csv file path with '.keyidx' added
+
+        Important Info:
+        the size and modification time of the csv file are saved with the index so a stale index
+        is not loaded; the index file is a fixed header, the keys as json and the byte offsets as little
+        endian 64 bit integers, so loading it does not run any code
+
+        Return:
+        variable
+        Type: string
+        Desc: file path the index was saved to
+        """
+        if self._dict_key_index is None:
+            raise ValueError('key index has not been built; use build_key_index()')
+
+        if m_string_index_path is None:
+            m_string_index_path = self._string_filepath + '.keyidx'
+
+        list_keys = list(self._dict_key_index)
+        array_counts = PackedArray('q', [len(self._dict_key_index[key]) for key in list_keys])
+        array_offsets = PackedArray('q', [int_offset for key in list_keys for int_offset in self._dict_key_index[key]])
+        bytes_keys = json.dumps({'key_columns': list(self._tuple_key_columns), 'keys': list_keys}).encode('utf-8')
+        if sys.byteorder != 'little':
+            array_counts.byteswap()
+            array_offsets.byteswap()
+
+        int_size, int_mtime_ns = self._get_file_signature()
+        bytes_header = self._struct_key_index_header.pack(self._bytes_key_index_magic, self._int_index_version,
+                                                          int_size, int_mtime_ns, len(bytes_keys),
+                                                          len(array_counts), len(array_offsets))
+        with open(m_string_index_path, 'wb') as file:
+            file.write(bytes_header)
+            file.write(bytes_keys)
+            array_counts.tofile(file)
+            array_offsets.tofile(file)
+        return m_string_index_path
+
+    def load_key_index(self, m_string_index_path = None):
+        """
+        this method loads a key index saved with save_key_index()
+
+        Requirements:
+        package json
+        package struct
+        package array
+
+        Inputs:
+        m_string_index_path
+        Type: string
+        Desc: file path of the saved index; defaults to the csv file path with '.keyidx' added
+
+        Important Info:
+        raises a ValueError if the csv file has changed since the index was saved, the index was
+        saved by an older version or the index file is not a key index or is corrupt
+
+        Return:
+        object
+        Type: tuple
+        Desc: positions of the columns the key index was built on
+        """
+        if m_string_index_path is None:
+            m_string_index_path = self._string_filepath + '.keyidx'
+
+        string_corrupt = 'key index file is corrupt; rebuild with build_key_index()'
+        tuple_signature = self._get_file_signature()
+        with open(m_string_index_path, 'rb') as file:
+            bytes_header = file.read(self._struct_key_index_header.size)
+            if len(bytes_header) != self._struct_key_index_header.size:
+                raise ValueError(string_corrupt)
+            bytes_magic, int_version, int_size, int_mtime_ns, int_keys_len, int_num_keys, int_num_offsets = \
+                self._struct_key_index_header.unpack(bytes_header)
+
+            if bytes_magic != self._bytes_key_index_magic or int_version != self._int_index_version:
+                raise ValueError('key index was saved by an older version; rebuild with build_key_index()')
+            if (int_size, int_mtime_ns) != tuple_signature:
+                raise ValueError('key index is out of date with the csv file; rebuild with build_key_index()')
+            if min(int_keys_len, int_num_keys, int_num_offsets) < 0:
+                raise ValueError(string_corrupt)
+
+            bytes_keys = file.read(int_keys_len)
+            array_counts = PackedArray('q')
+            array_offsets = PackedArray('q')
+            try:
+                array_counts.fromfile(file, int_num_keys)
+                array_offsets.fromfile(file, int_num_offsets)
+            except (EOFError, ValueError):
+                raise ValueError(string_corrupt)
+            if sys.byteorder != 'little':
+                array_counts.byteswap()
+                array_offsets.byteswap()
+
+        # json decoding errors are ValueErrors
+        dict_keys = json.loads(bytes_keys.decode('utf-8'))
+        if not isinstance(dict_keys, dict) or len(dict_keys.get('keys', [])) != int_num_keys or \
+            min(array_counts, default = 0) < 0 or sum(array_counts) != int_num_offsets:
+            raise ValueError(string_corrupt)
+        tuple_key_columns = tuple(int(int_column) for int_column in dict_keys['key_columns'])
+        if len(tuple_key_columns) == 0:
+            raise ValueError(string_corrupt)
+
+        # json stores the tuple keys of multiple columns as lists
+        dict_key_index = dict()
+        int_start = 0
+        for key, int_count in zip(dict_keys['keys'], array_counts):
+            if isinstance(key, list) and all(isinstance(value, str) for value in key):
+                key = tuple(key)
+            elif not isinstance(key, str):
+                raise ValueError(string_corrupt)
+            dict_key_index[key] = array_offsets[int_start:int_start + int_count].tolist()
+            int_start += int_count
+
+        self._tuple_key_columns = tuple_key_columns
+        self._dict_key_index = dict_key_index
+        return self._tuple_key_columns
+
+    def get_csv_rows_by_key(self, m_list_keys):
+        """
+        this method retrieves all the lines which match the keys using the key index; only the 
+        matching lines are read from the file, each with one seek to its byte offset
+
+        Requirements:
+        package pandas.DataFrame
+
+        Inputs:
+        m_list_keys
+        Type: list
+        Desc: keys to retrieve; a key is a value if the index was built on one column or a tuple
+            of values if it was built on multiple columns
+
+        Important Info:
+        keys not in the index are ignored; the lines are returned in the order of the keys and 
+        then in the order of the file
+
+        Return:
+        object
+        Type: pandas DataFrame, or the type of the result backend
+        Desc: dataframe with the lines that match the keys
+        """
+        if self._dict_key_index is None:
+            raise ValueError('key index has not been built; use build_key_index() or load_key_index()')
+
+        if isinstance(m_list_keys, str):
+            m_list_keys = [m_list_keys]
+
+        list_offsets = list()
+        for key in m_list_keys:
+            list_offsets.extend(self._dict_key_index.get(key, list()))
+        return self._build_result(self._read_records_at_offsets(list_offsets))
+
+    def build_strata_index(self, m_column):
+        """
+        this method reads the csv file once and groups the byte offsets of the rows by the value of a 
+        column so samples can be drawn per value with get_csv_stratified_lines()
+
+        Requirements:
+        package numpy.array
+
+        Inputs:
+        m_column
+        Type: string or int
+        Desc: column name or position to stratify on
+
+        Important Info:
+        the byte offsets are the start of the rows in the file, so the sampled rows are exact in
+        estimate mode as well
+
+        Return:
+        object
+        Type: dictionary
+        Desc: the strata index; column value -> numpy array of byte offsets
+        """
+        from numpy import array
+
+        int_column = self._get_column_positions(m_column)[0]
+        dict_strata = dict()
+
+        for int_line_number, int_offset, list_values in self._iter_csv_rows(int_column):
+            dict_strata.setdefault(list_values[int_column], list()).append(int_offset)
+
+        self._dict_strata_index = {stratum: array(list_offsets, dtype = 'int64')
+                                   for stratum, list_offsets in dict_strata.items()}
+        return self._dict_strata_index
+
+    def get_csv_stratified_lines(self, m_lines_per_stratum, m_bool_replace = True, m_int_seed = None):
+        """
+        this method samples lines from each stratum of the strata index; only the sampled lines are
+        read from the file
+
+        Requirements:
+        package numpy.random.default_rng
+
+        Inputs:
+        m_lines_per_stratum
+        Type: int or dictionary
+        Desc: number of lines to sample from every stratum, or a dictionary of stratum -> number of
+            lines to sample only those strata
+
+        m_bool_replace
+        Type: boolean
+        Desc: flag to sample with replacement
+
+        m_int_seed
+        Type: int
+        Desc: seed for the random generator; None for a random seed
+
+        Important Info:
+        build_strata_index() must be called first; the lines are grouped by stratum in the dataframe; with 
+        replacement a stratum can be sampled more times than it has lines, eg. to oversample a small class
+
+        Return:
+        object
+        Type: pandas DataFrame, or the type of the result backend
+        Desc: dataframe with the sampled lines
+        """
+        if self._dict_strata_index is None:
+            raise ValueError('strata index has not been built; use build_strata_index()')
+
+        if isinstance(m_lines_per_stratum, dict):
+            dict_lines_per_stratum = m_lines_per_stratum
+        else:
+            dict_lines_per_stratum = {stratum: m_lines_per_stratum for stratum in self._dict_strata_index}
+
+        from numpy.random import default_rng
+
+        rng = default_rng(m_int_seed)
+        list_offsets = list()
+        for stratum, int_num_lines in dict_lines_per_stratum.items():
+            if stratum not in self._dict_strata_index:
+                raise ValueError('stratum ' + str(stratum) + ' is not in the strata index')
+
+            array_offsets = self._dict_strata_index[stratum]
+            if not m_bool_replace and int_num_lines > len(array_offsets):
+                raise ValueError('number of lines requested is more than the number of lines in stratum ' +
+                                 str(stratum))
+            list_offsets.extend(rng.choice(array_offsets, int_num_lines, replace = m_bool_replace).tolist())
+
+        return self._build_result(self._read_records_at_offsets(list_offsets))
+
+    def build_weights_index(self, m_column):
+        """
+        this method reads the csv file once and builds the cumulative weights of a numeric column
+        so lines can be sampled in proportion to the column with get_csv_weighted_lines()
+
+        Requirements:
+        package numpy.array
+        package numpy.cumsum
+
+        Inputs:
+        m_column
+        Type: string or int
+        Desc: column name or position which holds the weights
+
+        Important Info:
+        the weights must be finite numbers greater than or equal to 0
+
+        Return:
+        variable
+        Type: float
+        Desc: total of the weights
+        """
+        from numpy import array, cumsum
+
+        int_column = self._get_column_positions(m_column)[0]
+        list_offsets = list()
+        list_weights = list()
+
+        for int_line_number, int_offset, list_values in self._iter_csv_rows(int_column):
+            try:
+                float_weight = float(list_values[int_column])
+            except ValueError:
+                raise ValueError('weight on line ' + str(int_line_number) + ' is not a number')
+            if not 0 <= float_weight < float('inf'):
+                raise ValueError('weight on line ' + str(int_line_number) + ' is negative or not finite')
+            list_offsets.append(int_offset)
+            list_weights.append(float_weight)
+
+        self._array_weight_offsets = array(list_offsets, dtype = 'int64')
+        self._array_cum_weights = cumsum(array(list_weights, dtype = 'float64'))
+        return float(self._array_cum_weights[-1]) if len(self._array_cum_weights) > 0 else 0.0
+
+    def get_csv_weighted_lines(self, m_int_num_lines, m_array_weights = None, m_int_seed = None):
+        """
+        this method samples lines with replacement in proportion to their weight; only the sampled
+        lines are read from the file
+
+        Requirements:
+        package numpy.cumsum
+        package numpy.searchsorted
+        package numpy.random.default_rng
+
+        Inputs:
+        m_int_num_lines
+        Type: int
+        Desc: number of lines to sample
+
+        m_array_weights
+        Type: list or numpy array
+        Desc: weight of every data line in the file, in file order, finite and greater than or equal 
+            to 0; if None the weights from build_weights_index() are used
+
+        m_int_seed
+        Type: int
+        Desc: seed for the random generator; None for a random seed
+
+        Important Info:
+        this is sampling with replacement, so more lines than the file has can be sampled; m_array_weights
+        is matched to the lines by line number, so it can not be used in estimate mode
+
+        Return:
+        object
+        Type: pandas DataFrame, or the type of the result backend
+        Desc: dataframe with the sampled lines
+        """
+        from numpy import array, arange, cumsum, isfinite, searchsorted
+        from numpy.random import default_rng
+
+        if m_array_weights is not None:
+            if self.estimate_mode:
+                raise ValueError('m_array_weights needs the line indexes, the file is in estimate mode; ' +
+                                 'use build_weights_index()')
+            int_first_line = 1 if self.has_header else 0
+            array_lines = arange(int_first_line, self.number_of_lines, dtype = 'int64')
+            array_weights = array(m_array_weights, dtype = 'float64')
+            if not (isfinite(array_weights).all() and (array_weights >= 0).all()):
+                raise ValueError('weights must be finite numbers greater than or equal to 0')
+            array_cum_weights = cumsum(array_weights)
+            if len(array_cum_weights) != len(array_lines):
+                raise ValueError('length of weights is not the same as the number of lines in the file')
+        elif self._array_cum_weights is not None:
+            array_lines = None
+            array_cum_weights = self._array_cum_weights
+        else:
+            raise ValueError('weights have not been built; use build_weights_index() or pass m_array_weights')
+
+        if len(array_cum_weights) == 0 or array_cum_weights[-1] <= 0:
+            raise ValueError('total of the weights must be greater than 0')
+
+        # a uniform draw over the total weight lands in the bucket of a line in proportion to its weight
+        rng = default_rng(m_int_seed)
+        array_draws = rng.random(m_int_num_lines) * array_cum_weights[-1]
+        array_posits = searchsorted(array_cum_weights, array_draws, side = 'right')
+        if array_lines is None:
+            return self._build_result(self._read_records_at_offsets(self._array_weight_offsets[array_posits].tolist()))
+        return self._build_result(self._read_lines(array_lines[array_posits].tolist()))
+
+    def _iter_csv_rows(self, m_int_max_column):
+        """
+        this method reads the data lines of the csv file in one pass; lines which are corrupt raise
+        an error or are skipped depending on the flag to ignore bad lines
+
+        Requirements:
+        package csv
+
+        Inputs:
+        m_int_max_column
+        Type: int
+        Desc: highest column position needed; lines without this column are bad lines if there 
+            is no header
+
+        Important Info:
+        the line number is the line of the file the row starts on, the header is line 0; the byte offset
+        is the start of the row in the file, which is exact in estimate mode as well; a row with a quoted
+        value over several lines is one row, read back whole with _read_records_at_offsets()
+
+        Return:
+        object
+        Type: generator
+        Desc: yields (line number, byte offset, list of values)
+        """
+        dialect = self.MyDialect(self._string_endline, self._string_quotechar,
+                    self._string_delimiter)
+
+        # decode the lines the same way the file is read in text mode
+        with self._open_text() as file:
+            string_encoding = file.encoding
+
+        with open(self._string_filepath, 'rb') as file:
+            list_next_offset = [0]
+            reader = csv.reader(self._iter_decoded_lines(file, string_encoding, list_next_offset), dialect)
+            if self.has_header:
+                next(reader, None)
+
+            # line_num is the number of lines read so far, which is the start of the next row
+            int_line_start = reader.line_num
+            int_offset_start = list_next_offset[0]
+            for list_values in reader:
+                if self.has_header:
+                    bool_bad_line = len(list_values) != len(self.header)
+                else:
+                    bool_bad_line = len(list_values) <= m_int_max_column
+
+                if bool_bad_line:
+                    if not self._bool_ignore_bad_lines:
+                        raise ValueError("Corrupt csv - header and row have different lengths")
+                else:
+                    yield int_line_start, int_offset_start, list_values
+                int_line_start = reader.line_num
+                int_offset_start = list_next_offset[0]
+
+    def _iter_decoded_lines(self, m_file, m_string_encoding, m_list_next_offset):
+        """
+        this method decodes the lines of a file opened in binary and keeps track of the byte offset
+        of the next line
+
+        Requirements:
+        None
+
+        Inputs:
+        m_file
+        Type: file object
+        Desc: file opened in binary for reading
+
+        m_string_encoding
+        Type: string
+        Desc: encoding of the file
+
+        m_list_next_offset
+        Type: list
+        Desc: one integer, updated to the byte offset after each line before the line is yielded
+
+        Important Info:
+        None
+
+        Return:
+        object
+        Type: generator
+        Desc: yields strings
+        """
+        for bytes_line in m_file:
+            m_list_next_offset[0] += len(bytes_line)
+            yield bytes_line.decode(m_string_encoding)
+
+    def _read_records_at_offsets(self, m_list_offsets):
+        """
+        this method reads the csv rows which start at byte offsets with one file handle, eg. the offsets
+        kept by the key, strata and weights indexes; a row with a quoted value over several lines is read
+        whole, the same as it was read when the index was built
+
+        Requirements:
+        package csv
+
+        Inputs:
+        m_list_offsets
+        Type: list
+        Desc: byte offsets of the start of the rows
+
+        Important Info:
+        each unique offset is read once, in file order; the offsets are exact so this does not depend 
+        on the line indexes or estimate mode
+
+        Return:
+        object
+        Type: list
+        Desc: strings of the rows, each with all the lines of the row
+        """
+        dialect = self.MyDialect(self._string_endline, self._string_quotechar,
+                    self._string_delimiter)
+
+        dict_records = dict()
+        with self._open_text() as file:
+            for int_offset in sorted(set(m_list_offsets)):
+                file.seek(int_offset)
+                list_lines = list()
+                try:
+                    next(csv.reader(self._iter_record_lines(file, list_lines), dialect), None)
+                except csv.Error as error:
+                    raise ValueError('Corrupt csv - ' + str(error))
+                dict_records[int_offset] = ''.join(list_lines)
+
+        return [dict_records[int_offset] for int_offset in m_list_offsets]
+
+    def _iter_record_lines(self, m_file, m_list_lines):
+        """
+        this method yields the lines of an open file and keeps them, so the lines the csv reader
+        needed for one row can be joined back into the text of the row
+
+        Requirements:
+        None
+
+        Inputs:
+        m_file
+        Type: file object
+        Desc: text file opened for reading with _open_text()
+
+        m_list_lines
+        Type: list
+        Desc: each line is added to this list before it is yielded
+
+        Important Info:
+        the csv reader only asks for the next line while the row is not finished
+
+        Return:
+        object
+        Type: generator
+        Desc: yields strings
+        """
+        while True:
+            string_line = m_file.readline()
+            if string_line == '':
+                return
+            m_list_lines.append(string_line)
+            yield string_line
+
+    def _get_column_positions(self, m_list_columns):
+        """
+        this method converts column names or positions to a tuple of column positions
+
+        Requirements:
+        None
+
+        Inputs:
+        m_list_columns
+        Type: string, int or list
+        Desc: column name(s) or position(s)
+
+        Important Info:
+        None
+
+        Return:
+        object
+        Type: tuple
+        Desc: positions of the columns
+        """
+        if isinstance(m_list_columns, (str, int)):
+            m_list_columns = [m_list_columns]
+
+        list_positions = list()
+        for column in m_list_columns:
+            if isinstance(column, str):
+                if not self.has_header:
+                    raise ValueError('column names can only be used if the csv file has a header')
+                if column not in self.header:
+                    raise ValueError('column ' + column + ' is not in the header')
+                list_positions.append(self.header.index(column))
+            else:
+                list_positions.append(int(column))
+
+        if len(list_positions) == 0:
+            raise ValueError('at least one column is required')
+        return tuple(list_positions)
+
     class MyDialect(csv.Dialect):
         """
         this class is a wrapper for a csv dialect which will be the format
@@ -0,0 +1,8 @@
+"""
+runs the filesampler command line interface with 'python -m FileSampler'
+"""
+
+import sys
+from FileSampler.cli import main
+
+sys.exit(main())
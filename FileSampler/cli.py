@@ -0,0 +1,420 @@
+"""
+This is the command line interface for FileSampler.  It samples lines from a file and streams them to
+stdout, so very large files can be sampled from a shell without writing Python.  The line indexes are
+saved next to the file (<file>.lineidx) and reused until the file changes.  Lines end at a line feed and
+are written as bytes exactly as they are in the file, so any encoding and line ending is kept.
+
+Line numbers start at 0, the same as TextSampler.
+
+Basic Usage:
+filesampler sample -n 1000 --seed 7 big_file.txt           # 1000 random lines, with replacement
+filesampler sample -n 1000 --without-replacement big_file.txt
+cat big_file.txt | filesampler sample -n 1000               # reservoir sampling of stdin, no index
+filesampler lines big_file.txt 10-20,500                    # lines 10 to 20 and line 500
+filesampler count big_file.txt                              # number of lines
+filesampler index build big_file.txt                        # build and save the line index
+"""
+
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#
+# File / Package Import
+#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+
+import argparse
+import os
+import sys
+from random import Random
+from FileSampler import TextSampler, IndexPermutation
+
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#
+# Functions
+#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+#$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$#
+
+# number of lines read from the file at a time; bounds the memory used to stream a sample
+int_batch_size = 10000
+
+def main(m_list_args = None):
+    """
+    this function is the entry point of the filesampler command
+
+    Requirements:
+    package argparse
+
+    Inputs:
+    m_list_args
+    Type: list
+    Desc: command line arguments; None to use sys.argv
+
+    Important Info:
+    None
+
+    Return:
+    variable
+    Type: integer
+    Desc: exit status
+    """
+    parser = _build_parser()
+    args = parser.parse_args(m_list_args)
+
+    try:
+        args.function(args)
+    except BrokenPipeError:
+        # the reader closed the pipe, eg. '| head'; stop writing without an error message
+        int_devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(int_devnull, sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as error:
+        parser.exit(2, 'filesampler: error: ' + str(error) + '\n')
+    return 0
+
+def _build_parser():
+    """
+    this function builds the argument parser with the sub commands
+
+    Requirements:
+    package argparse
+
+    Inputs:
+    None
+    Type: n/a
+    Desc: n/a
+
+    Important Info:
+    None
+
+    Return:
+    object
+    Type: argparse.ArgumentParser
+    Desc: parser for the command line
+    """
+    parser = argparse.ArgumentParser(prog = 'filesampler',
+                                     description = 'sample lines from large files without loading them into memory')
+    subparsers = parser.add_subparsers(dest = 'command', metavar = 'command')
+    subparsers.required = True
+
+    # sample
+    parser_sample = subparsers.add_parser('sample', help = 'write random lines to stdout')
+    parser_sample.add_argument('file', nargs = '?', default = '-',
+                               help = 'file to sample; - or no file reads stdin with reservoir sampling')
+    parser_sample.add_argument('-n', '--number', type = int, required = True, dest = 'number',
+                               help = 'number of lines to sample')
+    parser_sample.add_argument('--seed', type = int, default = None, help = 'seed for the random generator')
+    parser_sample.add_argument('--without-replacement', action = 'store_true', dest = 'without_replacement',
+                               help = 'sample each line at most once; stdin is always sampled this way')
+    parser_sample.add_argument('--header', action = 'store_true',
+                               help = 'write the first line before the sample and do not sample it')
+    parser_sample.set_defaults(function = _command_sample)
+
+    # lines
+    parser_lines = subparsers.add_parser('lines', help = 'write lines by line number to stdout')
+    parser_lines.add_argument('file', help = 'file to read')
+    parser_lines.add_argument('line_numbers', help = 'line numbers and ranges, starting at 0; eg. 10-20,500')
+    parser_lines.set_defaults(function = _command_lines)
+
+    # count
+    parser_count = subparsers.add_parser('count', help = 'write the number of lines to stdout')
+    parser_count.add_argument('file', help = 'file to count')
+    parser_count.set_defaults(function = _command_count)
+
+    # index
+    parser_index = subparsers.add_parser('index', help = 'manage the saved line index')
+    subparsers_index = parser_index.add_subparsers(dest = 'index_command', metavar = 'index_command')
+    subparsers_index.required = True
+    parser_index_build = subparsers_index.add_parser('build', help = 'build and save the line index')
+    parser_index_build.add_argument('file', help = 'file to index')
+    parser_index_build.set_defaults(function = _command_index_build)
+
+    return parser
+
+def _get_sampler(m_string_filepath):
+    """
+    this function creates a TextSampler that reuses the saved line index; if the index was built
+    from the file it is saved for the next time; every line of the file is indexed, there is no
+    estimate mode, so the lines written are always the lines asked for; a saved estimate is not
+    loaded because there is no limit on the number of lines indexed
+
+    Requirements:
+    class TextSampler
+
+    Inputs:
+    m_string_filepath
+    Type: string
+    Desc: file path
+
+    Important Info:
+    if the index can not be saved, eg. the directory is read only, the sampler is still returned
+
+    Return:
+    object
+    Type: TextSampler
+    Desc: sampler for the file
+    """
+    sampler = TextSampler(m_string_filepath, m_bool_use_saved_index = True, m_int_max_indexed_lines = None)
+    if not sampler.index_loaded:
+        try:
+            sampler.save_line_indexes()
+        except OSError:
+            pass
+    return sampler
+
+def _write_lines(m_list_lines):
+    """
+    this function writes lines to stdout as bytes, adding a line feed if a line does not end with one,
+    eg. the last line of a file
+
+    Requirements:
+    package sys
+
+    Inputs:
+    m_list_lines
+    Type: list
+    Desc: bytes of the lines to write
+
+    Important Info:
+    None
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    for bytes_line in m_list_lines:
+        sys.stdout.buffer.write(bytes_line if bytes_line.endswith(b'\n') else bytes_line + b'\n')
+
+def _write_line_numbers(m_sampler, m_iter_line_numbers):
+    """
+    this function reads lines in batches and writes them to stdout, so only one batch is in memory; line
+    numbers can repeat and there can be more of them than lines in the file
+
+    Requirements:
+    class TextSampler
+
+    Inputs:
+    m_sampler
+    Type: TextSampler
+    Desc: sampler for the file
+
+    m_iter_line_numbers
+    Type: iterator
+    Desc: line numbers to write, in order
+
+    Important Info:
+    None
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    for list_line_numbers in m_sampler._iter_batches(m_iter_line_numbers, int_batch_size):
+        _write_lines(m_sampler._read_lines(list_line_numbers, m_bool_bytes = True))
+
+def _command_sample(m_args):
+    """
+    this function writes a random sample of lines to stdout
+
+    Requirements:
+    class TextSampler
+    class IndexPermutation
+
+    Inputs:
+    m_args
+    Type: argparse.Namespace
+    Desc: arguments of the sample command
+
+    Important Info:
+    without replacement the sample is the first lines of a random permutation of the line numbers,
+    so no set or list of all the line numbers is held in memory
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    if m_args.number < 0:
+        raise ValueError('number of lines must be 0 or greater')
+
+    if m_args.file == '-':
+        _sample_stdin(m_args)
+        return
+
+    sampler = _get_sampler(m_args.file)
+    int_first_line = 1 if m_args.header else 0
+    int_num_data_lines = sampler.number_of_lines - int_first_line
+    if m_args.header and sampler.number_of_lines > 0:
+        _write_lines(sampler._read_lines([0], m_bool_bytes = True))
+
+    rng = Random(m_args.seed)
+    if m_args.without_replacement:
+        if m_args.number > int_num_data_lines:
+            raise ValueError('number of lines requested is more than the number of lines in the file')
+        permutation = IndexPermutation(int_num_data_lines, rng.getrandbits(64))
+        iter_line_numbers = (int_first_line + permutation[x] for x in range(0, m_args.number))
+    else:
+        if int_num_data_lines < 1 and m_args.number > 0:
+            raise ValueError('there are no lines in the file to sample')
+        iter_line_numbers = (int_first_line + rng.randrange(0, int_num_data_lines)
+                             for x in range(0, m_args.number))
+    _write_line_numbers(sampler, iter_line_numbers)
+
+def _sample_stdin(m_args):
+    """
+    this function samples lines from stdin with reservoir sampling; the file does not need to be
+    indexed or seekable and only the sample is held in memory
+
+    Requirements:
+    package random.Random
+
+    Inputs:
+    m_args
+    Type: argparse.Namespace
+    Desc: arguments of the sample command
+
+    Important Info:
+    this is sampling without replacement; the lines are written in a random order; stdin is read as bytes
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    rng = Random(m_args.seed)
+    list_reservoir = list()
+    if m_args.header:
+        bytes_header = sys.stdin.buffer.readline()
+        if bytes_header:
+            _write_lines([bytes_header])
+
+    for int_line, bytes_line in enumerate(sys.stdin.buffer):
+        if int_line < m_args.number:
+            list_reservoir.append(bytes_line)
+        else:
+            # keep the line with probability number / lines seen
+            int_slot = rng.randrange(0, int_line + 1)
+            if int_slot < m_args.number:
+                list_reservoir[int_slot] = bytes_line
+
+    rng.shuffle(list_reservoir)
+    _write_lines(list_reservoir)
+
+def _command_lines(m_args):
+    """
+    this function writes lines by line number to stdout
+
+    Requirements:
+    class TextSampler
+
+    Inputs:
+    m_args
+    Type: argparse.Namespace
+    Desc: arguments of the lines command
+
+    Important Info:
+    None
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    sampler = _get_sampler(m_args.file)
+    list_ranges = _parse_line_numbers(m_args.line_numbers)
+    for int_start, int_end in list_ranges:
+        if int_start < 0 or int_end >= sampler.number_of_lines:
+            raise ValueError('line numbers must be between 0 and ' + str(sampler.number_of_lines - 1))
+
+    iter_line_numbers = (int_line for int_start, int_end in list_ranges
+                         for int_line in range(int_start, int_end + 1))
+    _write_line_numbers(sampler, iter_line_numbers)
+
+def _parse_line_numbers(m_string_line_numbers):
+    """
+    this function parses a list of line numbers and ranges, eg. '10-20,500'
+
+    Requirements:
+    None
+
+    Inputs:
+    m_string_line_numbers
+    Type: string
+    Desc: comma separated line numbers or ranges; a range includes both ends
+
+    Important Info:
+    None
+
+    Return:
+    object
+    Type: list
+    Desc: tuples of (first line, last line)
+    """
+    list_ranges = list()
+    for string_part in m_string_line_numbers.split(','):
+        string_part = string_part.strip()
+        if string_part == '':
+            continue
+        try:
+            if '-' in string_part:
+                string_start, string_end = string_part.split('-', 1)
+                tuple_range = (int(string_start), int(string_end))
+            else:
+                tuple_range = (int(string_part), int(string_part))
+        except ValueError:
+            raise ValueError('invalid line number or range: ' + string_part)
+
+        if tuple_range[0] > tuple_range[1]:
+            raise ValueError('range is backwards: ' + string_part)
+        list_ranges.append(tuple_range)
+    return list_ranges
+
+def _command_count(m_args):
+    """
+    this function writes the number of lines in the file to stdout
+
+    Requirements:
+    class TextSampler
+
+    Inputs:
+    m_args
+    Type: argparse.Namespace
+    Desc: arguments of the count command
+
+    Important Info:
+    None
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    sampler = _get_sampler(m_args.file)
+    sys.stdout.write(str(sampler.number_of_lines) + '\n')
+
+def _command_index_build(m_args):
+    """
+    this function builds the line index from the file and saves it, replacing any saved index
+
+    Requirements:
+    class TextSampler
+
+    Inputs:
+    m_args
+    Type: argparse.Namespace
+    Desc: arguments of the index build command
+
+    Important Info:
+    None
+
+    Return:
+    None
+    Type: n/a
+    Desc: n/a
+    """
+    sampler = TextSampler(m_args.file, m_int_max_indexed_lines = None)
+    sys.stdout.write(sampler.save_line_indexes() + '\n')
@@ -47,11 +47,36 @@ setup(
 
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
+        'Programming Language :: Python :: 3.13',
     ],
 
+    # multiprocessing.shared_memory needs Python 3.8
+    python_requires='>=3.8',
+
+    # numpy.random.default_rng needs numpy 1.17; pyarrow is only needed for the
+    # arrow result backend
+    install_requires=['numpy>=1.17', 'pandas'],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
+
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(include = ['pandas', 'csv', 'random', 'io', 'numpy']),
+    packages=find_packages(include = ['FileSampler']),
+
+    # To provide executable scripts, use entry points in preference to the
+    # "scripts" keyword. Entry points provide cross-platform support and allow
+    # pip to create the appropriate form of executable for the target platform.
+    entry_points={
+        'console_scripts': [
+            'filesampler=FileSampler.cli:main',
+        ],
+    },
 
 )
\ No newline at end of file
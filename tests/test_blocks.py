@@ -0,0 +1,84 @@
+"""
+tests of block sampling: blocks of the line index and the byte blocks of estimate mode
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from FileSampler import TextSampler
+
+class TestBlocks(unittest.TestCase):
+
+    int_num_lines = 1000
+
+    def setUp(self):
+        self.string_dir = tempfile.mkdtemp()
+        # lines of different lengths, with CRLF and LF endings
+        self.list_lines = ['line' + str(x) * (1 + x % 5) + ('\r\n' if x % 2 else '\n')
+                           for x in range(0, self.int_num_lines)]
+        self.string_filepath = os.path.join(self.string_dir, 'lines.txt')
+        with open(self.string_filepath, 'wb') as file:
+            file.write(''.join(self.list_lines).encode('ascii'))
+
+        # byte offset of the start of each line
+        self.list_offsets = [0]
+        for string_line in self.list_lines:
+            self.list_offsets.append(self.list_offsets[-1] + len(string_line))
+
+    def tearDown(self):
+        shutil.rmtree(self.string_dir)
+
+    def test_line_blocks(self):
+        sampler = TextSampler(self.string_filepath)
+        list_sample = sampler.get_random_blocks(95, 10, m_int_seed = 5)
+        dict_design = sampler.sample_design
+
+        self.assertEqual(len(list_sample), 95)
+        self.assertEqual(dict_design['number_of_blocks'], 10)
+        # every block is whole except the last one drawn, which is cut to the lines still needed
+        list_expected = list()
+        for int_block_start in dict_design['block_starts']:
+            self.assertEqual(int_block_start % 10, 0)
+            list_expected.extend(self.list_lines[int_block_start:int_block_start + 10])
+        self.assertEqual(len(set(list_sample)), 95)
+        self.assertTrue(set(list_sample) <= set(list_expected))
+        self.assertEqual(len(list_expected), 100)
+        self.assertEqual(list_sample, [string_line for string_line in list_expected if string_line in set(list_sample)])
+
+    def test_first_line_is_skipped(self):
+        sampler = TextSampler(self.string_filepath)
+        list_sample = sampler._get_random_block_lines(self.int_num_lines - 1, 7, False, 1, 1)
+        self.assertEqual(list_sample, self.list_lines[1:])
+
+    def test_byte_blocks(self):
+        sampler = TextSampler(self.string_filepath, m_bool_estimate = True)
+        self.assertTrue(sampler.estimate_mode)
+
+        for bool_shuffle in (False, True):
+            list_sample = sampler.get_random_blocks(200, 20, m_bool_shuffle = bool_shuffle, m_int_seed = 9)
+            dict_design = sampler.sample_design
+            self.assertEqual(dict_design['design'], 'byte block random without replacement')
+            self.assertEqual(len(list_sample), 200)
+            self.assertEqual(len(set(list_sample)), 200)
+
+            # a block is the whole lines which start in its bytes; the last block drawn can be cut short
+            int_block_bytes = dict_design['block_bytes']
+            list_expected = list()
+            for int_block_offset in dict_design['block_start_offsets']:
+                self.assertEqual(int_block_offset % int_block_bytes, 0)
+                list_expected.extend(string_line for string_line, int_offset in zip(self.list_lines, self.list_offsets)
+                                     if int_block_offset <= int_offset < int_block_offset + int_block_bytes)
+            self.assertTrue(set(list_sample) <= set(list_expected))
+            if not bool_shuffle:
+                self.assertEqual(list_sample, [string_line for string_line in self.list_lines
+                                               if string_line in set(list_sample)])
+
+    def test_byte_blocks_cover_the_file(self):
+        sampler = TextSampler(self.string_filepath, m_bool_estimate = True)
+        list_sample = sampler.get_random_blocks(self.int_num_lines, 15, m_int_seed = 2)
+        self.assertEqual(list_sample, self.list_lines)
+
+if __name__ == '__main__':
+    unittest.main()
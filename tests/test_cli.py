@@ -0,0 +1,144 @@
+"""
+tests of the filesampler command line: the line number parser, the commands and the saved line index
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from FileSampler import TextSampler
+from FileSampler.cli import main, _parse_line_numbers
+
+def run_main(m_list_args, m_bytes_stdin = b''):
+    """
+    runs the command line with the arguments and returns the exit status and the bytes written to stdout
+    """
+    stdout = io.TextIOWrapper(io.BytesIO())
+    stdin = io.TextIOWrapper(io.BytesIO(m_bytes_stdin))
+    with mock.patch('sys.stdout', stdout), mock.patch('sys.stdin', stdin), \
+        mock.patch('sys.stderr', io.StringIO()):
+        try:
+            int_status = main(m_list_args)
+        except SystemExit as error:
+            int_status = error.code
+        stdout.flush()
+        return int_status, stdout.buffer.getvalue()
+
+class TestParseLineNumbers(unittest.TestCase):
+
+    def test_ranges(self):
+        self.assertEqual(_parse_line_numbers('10-20,500'), [(10, 20), (500, 500)])
+        self.assertEqual(_parse_line_numbers(' 1 , 2-3,'), [(1, 1), (2, 3)])
+        self.assertEqual(_parse_line_numbers('0-5,0-5'), [(0, 5), (0, 5)])
+
+    def test_invalid(self):
+        for string_line_numbers in ('a', '1-b', '5-3', '1-2-3'):
+            with self.assertRaises(ValueError):
+                _parse_line_numbers(string_line_numbers)
+
+class TestCommands(unittest.TestCase):
+
+    def setUp(self):
+        self.string_dir = tempfile.mkdtemp()
+        self.list_lines = [('line' + str(x) + '\n').encode('ascii') for x in range(0, 20)]
+        self.string_filepath = self.write_file('lines.txt', b''.join(self.list_lines))
+
+    def tearDown(self):
+        shutil.rmtree(self.string_dir)
+
+    def write_file(self, m_string_name, m_bytes_data):
+        string_filepath = os.path.join(self.string_dir, m_string_name)
+        with open(string_filepath, 'wb') as file:
+            file.write(m_bytes_data)
+        return string_filepath
+
+    def test_lines(self):
+        int_status, bytes_out = run_main(['lines', self.string_filepath, '3-5,1,0-1'])
+        self.assertEqual(int_status, 0)
+        self.assertEqual(bytes_out, b''.join(self.list_lines[x] for x in [3, 4, 5, 1, 0, 1]))
+
+    def test_lines_out_of_range(self):
+        int_status, bytes_out = run_main(['lines', self.string_filepath, '19-20'])
+        self.assertEqual(int_status, 2)
+        self.assertEqual(bytes_out, b'')
+
+    def test_lines_are_written_as_bytes(self):
+        # only a line feed ends a line; carriage returns and non utf-8 bytes are written unchanged
+        string_filepath = self.write_file('mixed.txt', b'a\rb\nc\r\ncaf\xe9\nlast')
+        int_status, bytes_out = run_main(['lines', string_filepath, '0-3'])
+        self.assertEqual(int_status, 0)
+        self.assertEqual(bytes_out, b'a\rb\nc\r\ncaf\xe9\nlast\n')
+
+    def test_count(self):
+        self.assertEqual(run_main(['count', self.string_filepath]), (0, b'20\n'))
+
+    def test_sample_with_replacement(self):
+        int_status, bytes_out = run_main(['sample', '-n', '30', '--seed', '3', self.string_filepath])
+        self.assertEqual(int_status, 0)
+        list_sample = bytes_out.splitlines(True)
+        self.assertEqual(len(list_sample), 30)
+        self.assertTrue(set(list_sample) <= set(self.list_lines))
+        self.assertEqual(run_main(['sample', '-n', '30', '--seed', '3', self.string_filepath])[1], bytes_out)
+
+    def test_sample_without_replacement(self):
+        int_status, bytes_out = run_main(['sample', '-n', '20', '--seed', '1', '--without-replacement',
+                                          self.string_filepath])
+        self.assertEqual(int_status, 0)
+        self.assertEqual(sorted(bytes_out.splitlines(True)), sorted(self.list_lines))
+
+        int_status, bytes_out = run_main(['sample', '-n', '21', '--without-replacement', self.string_filepath])
+        self.assertEqual(int_status, 2)
+
+    def test_sample_header(self):
+        int_status, bytes_out = run_main(['sample', '-n', '19', '--seed', '2', '--without-replacement',
+                                          '--header', self.string_filepath])
+        list_sample = bytes_out.splitlines(True)
+        self.assertEqual(list_sample[0], self.list_lines[0])
+        self.assertEqual(sorted(list_sample[1:]), sorted(self.list_lines[1:]))
+
+    def test_sample_stdin(self):
+        bytes_data = b''.join(self.list_lines)
+        int_status, bytes_out = run_main(['sample', '-n', '5', '--seed', '4'], bytes_data)
+        list_sample = bytes_out.splitlines(True)
+        self.assertEqual(int_status, 0)
+        self.assertEqual(len(list_sample), 5)
+        self.assertEqual(len(set(list_sample)), 5)
+        self.assertTrue(set(list_sample) <= set(self.list_lines))
+
+        # asking for more lines than stdin has returns every line once
+        int_status, bytes_out = run_main(['sample', '-n', '50', '--header', '-'], bytes_data)
+        list_sample = bytes_out.splitlines(True)
+        self.assertEqual(list_sample[0], self.list_lines[0])
+        self.assertEqual(sorted(list_sample[1:]), sorted(self.list_lines[1:]))
+
+    def test_index_is_saved_and_reused(self):
+        string_index_path = self.string_filepath + '.lineidx'
+        run_main(['count', self.string_filepath])
+        self.assertTrue(os.path.exists(string_index_path))
+        self.assertTrue(TextSampler(self.string_filepath, m_bool_use_saved_index = True).index_loaded)
+
+        self.assertEqual(run_main(['index', 'build', self.string_filepath]),
+                         (0, (string_index_path + '\n').encode()))
+
+    def test_stale_index_is_rebuilt(self):
+        run_main(['count', self.string_filepath])
+        with open(self.string_filepath, 'ab') as file:
+            file.write(b'line20\n')
+        os.utime(self.string_filepath, ns = (0, 10 ** 9))
+
+        self.assertFalse(TextSampler(self.string_filepath, m_bool_use_saved_index = True).index_loaded)
+        self.assertEqual(run_main(['count', self.string_filepath]), (0, b'21\n'))
+        self.assertEqual(run_main(['lines', self.string_filepath, '20']), (0, b'line20\n'))
+
+    def test_corrupt_index_is_rebuilt(self):
+        string_index_path = self.string_filepath + '.lineidx'
+        for bytes_index in (b'', b'not an index', b'FSLINEIX' + b'\x00' * 100):
+            with open(string_index_path, 'wb') as file:
+                file.write(bytes_index)
+            self.assertEqual(run_main(['lines', self.string_filepath, '7']), (0, b'line7\n'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+tests of the csv key index: exact byte offsets, retrieval by key and the saved key index
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from FileSampler import CsvSampler
+
+class TestKeyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.string_dir = tempfile.mkdtemp()
+        self.list_rows = [('k' + str(x % 7), 'g' + str(x % 3), 'v' + str(x)) for x in range(0, 200)]
+        self.string_filepath = self.write_file('keys.csv', ['id,group,value'] + [','.join(tup_row)
+                                               for tup_row in self.list_rows])
+
+    def tearDown(self):
+        shutil.rmtree(self.string_dir)
+
+    def write_file(self, m_string_name, m_list_lines, m_string_newline = '\n'):
+        string_filepath = os.path.join(self.string_dir, m_string_name)
+        with open(string_filepath, 'wb') as file:
+            file.write(''.join(string_line + m_string_newline for string_line in m_list_lines).encode('utf-8'))
+        return string_filepath
+
+    def get_sampler(self, m_string_filepath, **kwargs):
+        return CsvSampler(m_string_filepath, string_result_backend = 'tuples', **kwargs)
+
+    def get_row_offsets(self, m_string_filepath):
+        # byte offset of the start of each data line
+        with open(m_string_filepath, 'rb') as file:
+            bytes_data = file.read()
+        list_offsets = [0] + [x + 1 for x in range(0, len(bytes_data)) if bytes_data[x:x + 1] == b'\n']
+        return list_offsets[1:-1]
+
+    def test_offsets_are_exact(self):
+        list_row_offsets = self.get_row_offsets(self.string_filepath)
+        dict_expected = dict()
+        for tup_row, int_offset in zip(self.list_rows, list_row_offsets):
+            dict_expected.setdefault(tup_row[0], list()).append(int_offset)
+
+        for bool_estimate in (False, True):
+            sampler = self.get_sampler(self.string_filepath, m_bool_estimate = bool_estimate)
+            self.assertEqual(sampler.estimate_mode, bool_estimate)
+            self.assertEqual(sampler.build_key_index('id'), dict_expected)
+            self.assertEqual(sampler.get_csv_rows_by_key(['k3', 'missing']),
+                             [tup_row for tup_row in self.list_rows if tup_row[0] == 'k3'])
+
+    def test_multiple_columns(self):
+        sampler = self.get_sampler(self.string_filepath)
+        sampler.build_key_index(['id', 'group'])
+        self.assertEqual(sampler.key_columns, (0, 1))
+        self.assertEqual(sampler.get_csv_rows_by_key([('k1', 'g2')]),
+                         [tup_row for tup_row in self.list_rows if tup_row[:2] == ('k1', 'g2')])
+
+    def test_crlf_and_multi_line_rows(self):
+        list_lines = ['id,txt', '1,"multi\nline"', '2,plain', '3,"a\r\nb"']
+        for string_newline in ('\n', '\r\n'):
+            string_filepath = self.write_file('multi.csv', list_lines, string_newline)
+            for bool_estimate in (False, True):
+                sampler = self.get_sampler(string_filepath, m_bool_estimate = bool_estimate)
+                sampler.build_key_index('id')
+                self.assertEqual(sampler.get_csv_rows_by_key(['3', '1', '2']),
+                                 [('3', 'a\r\nb'), ('1', 'multi\nline'), ('2', 'plain')])
+
+    def test_no_header(self):
+        string_filepath = self.write_file('no_header.csv', ['a,1', 'b,2', 'a,3'])
+        sampler = self.get_sampler(string_filepath, m_bool_has_header = False)
+        sampler.build_key_index(0)
+        self.assertEqual(sampler.get_csv_rows_by_key(['a']), [('a', '1'), ('a', '3')])
+
+    def test_save_and_load(self):
+        for list_columns in ('id', ['id', 'group']):
+            sampler = self.get_sampler(self.string_filepath)
+            dict_key_index = sampler.build_key_index(list_columns)
+            string_index_path = sampler.save_key_index()
+
+            sampler_loaded = self.get_sampler(self.string_filepath)
+            self.assertEqual(sampler_loaded.load_key_index(string_index_path), sampler.key_columns)
+            self.assertEqual(sampler_loaded._dict_key_index, dict_key_index)
+
+    def test_stale_or_corrupt_index_is_rejected(self):
+        sampler = self.get_sampler(self.string_filepath)
+        sampler.build_key_index('id')
+        string_index_path = sampler.save_key_index()
+        with open(string_index_path, 'rb') as file:
+            bytes_index = file.read()
+
+        for bytes_corrupt in (b'', b'not an index', bytes_index[:-3], bytes_index[:60]):
+            with open(string_index_path, 'wb') as file:
+                file.write(bytes_corrupt)
+            with self.assertRaises(ValueError):
+                self.get_sampler(self.string_filepath).load_key_index()
+
+        with open(string_index_path, 'wb') as file:
+            file.write(bytes_index)
+        os.utime(self.string_filepath, ns = (0, 10 ** 9))
+        with self.assertRaises(ValueError):
+            self.get_sampler(self.string_filepath).load_key_index()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+tests of the shuffled, sharded line numbers: IndexPermutation and iter_shard_line_numbers()
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from FileSampler import IndexPermutation, TextSampler
+
+# sizes around the powers of 4, where the feistel network changes its number of bits
+list_sizes = [0, 1, 2, 3] + sorted({x + d for x in [4 ** p for p in range(1, 7)] for d in (-1, 0, 1)})
+
+class TestIndexPermutation(unittest.TestCase):
+
+    def test_bijective(self):
+        for int_size in list_sizes:
+            for int_epoch in range(0, 3):
+                permutation = IndexPermutation(int_size, 11, int_epoch)
+                self.assertEqual(len(permutation), int_size)
+                self.assertEqual(sorted(permutation[x] for x in range(0, int_size)), list(range(0, int_size)))
+
+    def test_deterministic(self):
+        list_first = [IndexPermutation(1000, 5, 2)[x] for x in range(0, 1000)]
+        list_second = [IndexPermutation(1000, 5, 2)[x] for x in range(0, 1000)]
+        list_other_epoch = [IndexPermutation(1000, 5, 3)[x] for x in range(0, 1000)]
+        self.assertEqual(list_first, list_second)
+        self.assertNotEqual(list_first, list_other_epoch)
+
+    def test_out_of_range(self):
+        permutation = IndexPermutation(10, 1)
+        with self.assertRaises(IndexError):
+            permutation[10]
+        with self.assertRaises(IndexError):
+            permutation[-11]
+        self.assertEqual(permutation[-1], permutation[9])
+
+class TestShards(unittest.TestCase):
+
+    int_num_lines = 1001
+
+    @classmethod
+    def setUpClass(cls):
+        cls.string_dir = tempfile.mkdtemp()
+        cls.string_filepath = os.path.join(cls.string_dir, 'lines.txt')
+        with open(cls.string_filepath, 'w') as file:
+            file.write(''.join('line' + str(x) + '\n' for x in range(0, cls.int_num_lines)))
+        cls.sampler = TextSampler(cls.string_filepath)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.string_dir)
+
+    def test_shards_disjoint_and_complete(self):
+        for int_world_size in (1, 2, 3, 4, 7):
+            for int_first_line in (0, 1):
+                list_shards = [list(self.sampler.iter_shard_line_numbers(3, 1, int_rank, int_world_size,
+                                    m_int_first_line = int_first_line))
+                               for int_rank in range(0, int_world_size)]
+                list_all = [int_line for list_shard in list_shards for int_line in list_shard]
+                self.assertEqual(len(list_all), len(set(list_all)))
+                self.assertEqual(sorted(list_all), list(range(int_first_line, self.int_num_lines)))
+                list_lengths = [len(list_shard) for list_shard in list_shards]
+                self.assertLessEqual(max(list_lengths) - min(list_lengths), 1)
+
+    def test_start_resumes_exactly(self):
+        for int_world_size in (1, 3):
+            for int_rank in range(0, int_world_size):
+                list_shard = list(self.sampler.iter_shard_line_numbers(9, 4, int_rank, int_world_size))
+                for int_start in (0, 1, 17, len(list_shard) - 1, len(list_shard), len(list_shard) + 5):
+                    list_resumed = list(self.sampler.iter_shard_line_numbers(9, 4, int_rank, int_world_size,
+                                        m_int_start = int_start))
+                    self.assertEqual(list_resumed, list_shard[int_start:])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            list(self.sampler.iter_shard_line_numbers(1, 0, m_int_start = -1))
+        with self.assertRaises(ValueError):
+            list(self.sampler.iter_shard_line_numbers(1, 0, m_int_rank = 2, m_int_world_size = 2))
+        with self.assertRaises(ValueError):
+            list(self.sampler.iter_shard_line_numbers(1, 0, m_int_world_size = 0))
+
+if __name__ == '__main__':
+    unittest.main()